@@ -0,0 +1,115 @@
+import re
+import threading
+from .lexical_index import parse_references, CONSTITUTION
+
+# Keyword routing of a query to the act(s) worth searching. A query that names an act,
+# or cites a section or article, is restricted to the acts it names. Otherwise topical
+# keywords score 1 each, and the search is narrowed to the best act only when the signal
+# is clear: at least TOPIC_MIN_SCORE hits and TOPIC_MARGIN times the runner-up. Anything
+# weaker searches every act, since a wrong filter hides the relevant act entirely.
+# Keywords are regexes matched as whole words ("fir" is not "first", "writ" is not
+# "written"); stems are spelled out with \w*. Devanagari keywords match anywhere (vowel
+# signs are not word characters to `re`).
+
+TOPIC_MIN_SCORE = 2
+TOPIC_MARGIN = 2
+
+ACT_NAMES = {
+    CONSTITUTION: (r"constitution(?:al)?", "संविधान"),
+    "BNS": ("bns", "bharatiya nyaya sanhita", "nyaya sanhita", "ipc", "indian penal code", "penal code"),
+    "BNSS": ("bnss", "nagarik suraksha sanhita", "suraksha sanhita", "crpc", r"cr\.p\.c", "criminal procedure"),
+    "BSA": ("bsa", "sakshya adhiniyam", "bharatiya sakshya", "evidence act"),
+}
+
+ACT_TOPICS = {
+    CONSTITUTION: (
+        r"fundamental rights?", r"directive principles?", r"writs?", "habeas corpus", "mandamus", "certiorari",
+        "parliament", "president", r"governors?", "supreme court", r"high courts?", "citizenship", "equality",
+        "freedom of speech", "right to life", "untouchability", "reservations?", r"amendments?",
+        r"union territor\w*", "lok sabha", "rajya sabha", r"emergency", "federal", "मौलिक अधिकार",
+    ),
+    "BNS": (
+        r"offen[cs]es?", r"punish\w*", r"penalt(?:y|ies)", "murder", "homicide", "theft", "robbery", "dacoity",
+        r"cheat\w*", "fraud", r"assault\w*", "hurt", "rape", r"sexual harass\w*", r"stalk\w*", r"kidnap\w*",
+        r"abduct\w*", "extortion", "defamation", "dowry", "cruelty", "criminal intimidation", r"trespass\w*",
+        "forgery", "mischief", "abetment", "conspiracy", "snatching", "mob lynching", "organised crime",
+        "terrorist act", "चोरी", "हत्या", "सजा", "अपराध", "दहेज",
+    ),
+    "BNSS": (
+        "bail", r"anticipatory bail", "fir", "first information report", "complaint to police", r"arrest\w*",
+        "custody", "remand", "investigation", r"charge ?sheets?", "summons", r"warrants?", r"magistrates?",
+        r"cogni[sz]able", r"trials?", "zero fir", "search and seizure", r"police stations?", "sessions court",
+        r"plea bargain\w*", "जमानत", "गिरफ्तार", "एफआईआर",
+    ),
+    "BSA": (
+        "evidence", r"witness\w*", "testimony", r"admissib\w*", r"confessions?", r"electronic records?",
+        "burden of proof", r"presumptions?", "expert opinion", r"documentary evidence", r"cross-examin\w*",
+        "examination-in-chief", "hearsay", "dying declaration", "relevancy", r"relevant facts?",
+        "साक्ष्य", "गवाह",
+    ),
+}
+
+
+def _pattern(keywords):
+    parts = []
+    for keyword in keywords:
+        if keyword.isascii():
+            keyword = rf"(?<![a-z0-9])(?:{keyword})(?![a-z0-9])"
+        parts.append(keyword)
+    return re.compile("|".join(parts))
+
+
+class ActRouter:
+    """Picks the acts a query is about, and counts the routing decisions for /admin/stats."""
+
+    def __init__(self, names=ACT_NAMES, topics=ACT_TOPICS, min_score=TOPIC_MIN_SCORE, margin=TOPIC_MARGIN):
+        self.min_score = min_score
+        self.margin = margin
+        self.acts = list(dict.fromkeys(list(names) + list(topics)))
+        self._names = {act: _pattern(keywords) for act, keywords in names.items()}
+        self._topics = {act: _pattern(keywords) for act, keywords in topics.items()}
+        self._lock = threading.Lock()
+        self._routed = {}  # act code or "all" -> queries
+
+    def scores(self, query):
+        """(named, topical): per act, explicit names/citations and topical keyword hits."""
+        text = query.casefold()
+        named, topical = {}, {}
+        for act, pattern in self._names.items():
+            hits = len(pattern.findall(text))
+            if hits:
+                named[act] = hits
+        # Explicit citations: "Article 21" is the Constitution, "BNS 303" names its act
+        for act, _ in parse_references(query):
+            if act:
+                named[act] = named.get(act, 0) + 1
+        for act, pattern in self._topics.items():
+            hits = len(pattern.findall(text))
+            if hits:
+                topical[act] = hits
+        return named, topical
+
+    def route(self, query):
+        """Act codes to restrict the search to, or None to search every act."""
+        named, topical = self.scores(query)
+        acts = None
+        if named:
+            acts = sorted(named)
+        elif topical:
+            ranked = sorted(topical.values(), reverse=True)
+            best, runner_up = ranked[0], (ranked[1] if len(ranked) > 1 else 0)
+            if best >= self.min_score and best >= self.margin * runner_up:
+                acts = [act for act, score in topical.items() if score == best]
+        if acts and len(acts) == len(self.acts):
+            acts = None
+        with self._lock:
+            for key in acts or ["all"]:
+                self._routed[key] = self._routed.get(key, 0) + 1
+        return acts
+
+    def stats(self):
+        with self._lock:
+            return {"routed": dict(self._routed)}
+
+
+router = ActRouter()
@@ -0,0 +1,93 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+
+
+def _unit(vector):
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class SemanticAnswerCache:
+    """
+    Caches generated answers for near-duplicate questions.
+
+    An answer is reused only when the new query was answered from the same
+    retrieved chunks, in the same language, and its embedding is within
+    `threshold` cosine similarity of a cached query. Entries expire after
+    `ttl` seconds and the least recently used are evicted beyond `maxsize`.
+    """
+
+    def __init__(self, threshold=0.95, ttl=3600, maxsize=512):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # entry id -> (bucket, unit vector, answer, created_at)
+        self._buckets = {}  # (language, chunk ids) -> [entry ids]
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def _bucket(language, chunk_ids):
+        return (language, tuple(chunk_ids))
+
+    def lookup(self, embedding, language, chunk_ids):
+        bucket = self._bucket(language, chunk_ids)
+        query = _unit(embedding)
+        now = time.time()
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id in list(self._buckets.get(bucket, ())):
+                _, vector, _, created_at = self._entries[entry_id]
+                if now - created_at > self.ttl:
+                    self._remove(entry_id)
+                    continue
+                score = sum(a * b for a, b in zip(query, vector))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][2]
+
+    def store(self, embedding, language, chunk_ids, answer):
+        bucket = self._bucket(language, chunk_ids)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (bucket, _unit(embedding), answer, time.time())
+            self._buckets.setdefault(bucket, []).append(entry_id)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def record_bypass(self):
+        self.bypassed += 1
+
+    def _remove(self, entry_id):
+        bucket = self._entries.pop(entry_id)[0]
+        ids = self._buckets.get(bucket)
+        if ids is not None:
+            ids.remove(entry_id)
+            if not ids:
+                del self._buckets[bucket]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,200 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Thread-safe, size-bounded in-process LRU with hit/miss counters."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class SQLiteStore:
+    """
+    Persistent key -> bytes store backed by a single SQLite file.
+
+    SQLite in WAL mode lets every uvicorn worker read and write the same file
+    concurrently, and the data survives restarts. Connections are per thread.
+    When `max_entries` is set, the oldest entries are pruned as new ones arrive.
+    """
+
+    PRUNE_EVERY = 100  # Inserts between size checks
+
+    def __init__(self, path, table="entries", max_entries=None):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._inserts = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_created_at ON {table}(created_at)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, value):
+        conn = self._conn()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+            (key, value, time.time()),
+        )
+        conn.commit()
+        self._inserts += 1
+        if self.max_entries and self._inserts % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def delete(self, key):
+        conn = self._conn()
+        conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        conn.commit()
+
+    def prune(self):
+        """Drop the oldest entries beyond max_entries."""
+        conn = self._conn()
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        conn.commit()
+
+    def count(self):
+        return self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class TwoTierCache(ABC):
+    """
+    A bounded in-process LRU in front of a SQLiteStore file shared by all workers.
+    Subclasses build the keys and say how a value is stored in the file (`encode` to
+    bytes, `decode` back). A broken file is logged and treated as a miss, never raised.
+    """
+
+    def __init__(self, path, table, memory_size=1024, max_disk_entries=None):
+        self.memory = LRUCache(maxsize=memory_size)
+        self.path = path
+        self.table = table
+        self.max_disk_entries = max_disk_entries
+        self._disk = None
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def disk(self):
+        # Opened on first use so importing the module never touches the filesystem
+        if self._disk is None:
+            with self._lock:
+                if self._disk is None:
+                    self._disk = SQLiteStore(self.path, table=self.table, max_entries=self.max_disk_entries)
+        return self._disk
+
+    @abstractmethod
+    def encode(self, value) -> bytes:
+        """The bytes stored in the SQLite file for a value."""
+
+    @abstractmethod
+    def decode(self, blob: bytes):
+        """The value stored as `blob`."""
+
+    def lookup(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        try:
+            blob = self.disk.get(key)
+        except Exception as e:
+            logger.warning(f"{type(self).__name__} disk read failed: {e}")
+            blob = None
+        if blob is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        value = self.decode(bytes(blob))
+        self.memory.put(key, value)
+        return value
+
+    def store(self, key, value):
+        self.memory.put(key, value)
+        try:
+            self.disk.put(key, self.encode(value))
+        except Exception as e:
+            logger.warning(f"{type(self).__name__} disk write failed: {e}")
+
+    def stats(self):
+        memory = self.memory.stats()
+        with self._lock:
+            disk_hits, misses = self.disk_hits, self.misses
+        lookups = memory["hits"] + disk_hits + misses
+        return {
+            "memory_hits": memory["hits"],
+            "disk_hits": disk_hits,
+            "misses": misses,
+            "memory_size": memory["size"],
+            "hit_rate": round((memory["hits"] + disk_hits) / lookups, 4) if lookups else 0.0,
+        }
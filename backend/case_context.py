@@ -0,0 +1,170 @@
+from datetime import datetime
+from .caching import LRUCache
+from .config import settings
+from . import judicial_engine, case_loaders
+
+
+class CaseSnapshot:
+    """
+    The prompt text for one case, built once per version of the case.
+    A version is identified by Case.updated_at, which every mutation in
+    routers/judicial.py bumps through `touch()`.
+    """
+
+    def __init__(self, case):
+        self.id = case.id
+        self.title = case.title
+        self.case_type = case.case_type
+        self.current_stage = case.current_stage
+        self.updated_at = case.updated_at
+        self.created_at = case.created_at
+        self.core, self.hearing_lines, self.evidence_lines = _focused_case_parts(case)
+        self.summary = _case_summary(case)
+
+    def next_step(self):
+        return judicial_engine.recommend_next_step(self.current_stage, self.case_type)
+
+
+def _focused_case_parts(c):
+    """Prompt pieces for the focused case: (core details, hearing lines oldest first, evidence lines)."""
+    core = f"\n=== FOCUSED CASE (User is asking about this case) ===\n"
+    core += f"Case #{c.id}: {c.title}\n"
+    core += f"CNR: {c.cnr_number or 'Not yet registered'}\n"
+    core += f"Type: {c.case_type} | Status: {c.status} | Current Stage: {c.current_stage}\n"
+    core += f"Description: {c.description}\n"
+    core += f"Plaintiff: {c.plaintiff_name} (Lawyer: {c.plaintiff_lawyer})\n"
+    core += f"Defendant: {c.defendant_name} (Lawyer: {c.defendant_lawyer})\n"
+    core += f"User's Role: {c.user_role}\n"
+    core += f"Registered: {c.created_at.strftime('%d %b %Y')}\n"
+
+    # Judgment
+    if c.judgment:
+        core += f"\nJUDGMENT: {c.judgment.verdict} on {c.judgment.date.strftime('%d %b %Y')}\n"
+        if c.judgment.summary:
+            core += f"Summary: {c.judgment.summary}\n"
+        if c.judgment.pronounced_by:
+            core += f"Pronounced by: {c.judgment.pronounced_by}\n"
+
+    # Next steps
+    next_step = judicial_engine.recommend_next_step(c.current_stage, c.case_type)
+    core += f"\nRecommended Next Step: {next_step}\n"
+
+    # All hearing details
+    hearing_lines = []
+    for i, h in enumerate(c.hearings, 1):
+        line = f"  {i}. {h.date.strftime('%d %b %Y')}"
+        if h.court_name:
+            line += f" at {h.court_name}"
+        if h.judge_name:
+            line += f" (Judge: {h.judge_name})"
+        if h.observation:
+            line += f" — {h.observation}"
+        if h.next_hearing_date:
+            line += f" | Next: {h.next_hearing_date.strftime('%d %b %Y')}"
+        hearing_lines.append(line + "\n")
+
+    # All evidence details
+    evidence_lines = []
+    for d in c.documents:
+        line = f"  - [{d.party}] {d.title} ({d.doc_type or 'General'})"
+        if d.content:
+            line += f": {d.content[:150]}"
+        evidence_lines.append(line + "\n")
+
+    return core, hearing_lines, evidence_lines
+
+
+def _case_summary(case):
+    """One block of the all-cases overview (the query-dependent next step is added by the caller)."""
+    summary = f"\n--- CASE #{case.id}: {case.title} ---\n"
+    summary += f"  CNR: {case.cnr_number or 'Not registered'}\n"
+    summary += f"  Type: {case.case_type} | Status: {case.status} | Stage: {case.current_stage}\n"
+    summary += f"  Description: {case.description or 'N/A'}\n"
+    summary += f"  Plaintiff: {case.plaintiff_name} (Lawyer: {case.plaintiff_lawyer})\n"
+    summary += f"  Defendant: {case.defendant_name} (Lawyer: {case.defendant_lawyer})\n"
+    summary += f"  User's Role: {case.user_role}\n"
+    summary += f"  Registered: {case.created_at.strftime('%d %b %Y')}\n"
+
+    # Hearing info
+    if case.hearings:
+        summary += f"  Total Hearings: {len(case.hearings)}\n"
+        last_hearing = case.hearings[-1]
+        summary += f"  Last Hearing: {last_hearing.date.strftime('%d %b %Y')}"
+        if last_hearing.observation:
+            summary += f" — {last_hearing.observation[:100]}"
+        summary += "\n"
+        if last_hearing.next_hearing_date:
+            summary += f"  Next Hearing: {last_hearing.next_hearing_date.strftime('%d %b %Y')}\n"
+
+    # Evidence info
+    plaintiff_docs = [d for d in case.documents if d.party == 'Plaintiff']
+    defendant_docs = [d for d in case.documents if d.party == 'Defendant']
+    summary += f"  Evidence: {len(plaintiff_docs)} from Plaintiff, {len(defendant_docs)} from Defendant\n"
+
+    # Judgment info
+    if case.judgment:
+        summary += f"  JUDGMENT: {case.judgment.verdict} on {case.judgment.date.strftime('%d %b %Y')}\n"
+        if case.judgment.summary:
+            summary += f"  Judgment Summary: {case.judgment.summary[:200]}\n"
+    return summary
+
+
+class CaseContextCache:
+    """
+    Case snapshots keyed by (case_id, updated_at): a snapshot is served only while the
+    case's updated_at still matches, so a stale entry is never used even when another
+    worker process made the change. Local mutations also drop the entry right away.
+    """
+
+    def __init__(self, maxsize=512):
+        self._cache = LRUCache(maxsize)
+
+    def peek(self, case_id, updated_at):
+        """The cached snapshot if it is for this version of the case, else None."""
+        entry = self._cache.get(case_id)
+        if entry is not None and entry.updated_at == updated_at:
+            return entry
+        return None
+
+    def get(self, case):
+        """Snapshot for the case's current version; builds it (touching the relationships) on a miss."""
+        snapshot = self.peek(case.id, case.updated_at)
+        if snapshot is None:
+            snapshot = CaseSnapshot(case)
+            self._cache.put(case.id, snapshot)
+        return snapshot
+
+    def load(self, db, user_id):
+        """
+        Snapshots of all of a user's cases. Costs one narrow SELECT when every snapshot
+        is current, plus one eager-loaded batch (3 SELECTs) for the stale ones, however
+        many cases the user has.
+        """
+        versions = case_loaders.case_versions(db, user_id)
+        snapshots = {}
+        stale = []
+        for case_id, updated_at in versions:
+            snapshot = self.peek(case_id, updated_at)
+            if snapshot is None:
+                stale.append(case_id)
+            else:
+                snapshots[case_id] = snapshot
+        for case in case_loaders.cases_for_context(db, stale):
+            snapshots[case.id] = CaseSnapshot(case)
+            self._cache.put(case.id, snapshots[case.id])
+        return [snapshots[case_id] for case_id, _ in versions if case_id in snapshots]
+
+    def invalidate(self, case_id):
+        self._cache.pop(case_id)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+case_cache = CaseContextCache(maxsize=settings.CASE_CONTEXT_CACHE_SIZE)
+
+
+def touch(case):
+    """Marks a case as changed: bumps updated_at (the snapshot version) and drops the cached snapshot."""
+    case.updated_at = datetime.utcnow()
+    case_cache.invalidate(case.id)
@@ -0,0 +1,59 @@
+from sqlalchemy.orm import joinedload, selectinload, load_only
+from . import models
+
+# Loader strategies per read path. Collections use selectinload (one extra SELECT per
+# relationship, however many cases are loaded); the one-to-one judgment is joined into
+# the main query. Each path therefore costs a fixed number of queries instead of N+1.
+
+# GET /cases (CaseResponse serializes every relationship)
+CASE_LIST = (
+    joinedload(models.Case.judgment),
+    selectinload(models.Case.events),
+    selectinload(models.Case.documents),
+    selectinload(models.Case.hearings),
+)
+
+# GET /cases/{case_id} page (the template shows hearings, evidence and the judgment)
+CASE_DETAIL = (
+    joinedload(models.Case.judgment),
+    selectinload(models.Case.documents),
+    selectinload(models.Case.hearings),
+)
+
+# Judicial chat context (hearings, evidence and judgment go into the prompt)
+CASE_CONTEXT = CASE_DETAIL
+
+# Judicial guidance case selector: only the columns the dropdown shows
+CASE_SELECTOR = (
+    load_only(models.Case.id, models.Case.title, models.Case.current_stage, models.Case.case_type, models.Case.cnr_number),
+)
+
+
+def list_cases(db, user_id):
+    return (
+        db.query(models.Case)
+        .options(*CASE_LIST)
+        .filter(models.Case.user_id == user_id)
+        .order_by(models.Case.updated_at.desc())
+        .all()
+    )
+
+
+def case_detail(db, case_id, user_id):
+    return (
+        db.query(models.Case)
+        .options(*CASE_DETAIL)
+        .filter(models.Case.id == case_id, models.Case.user_id == user_id)
+        .first()
+    )
+
+
+def case_versions(db, user_id):
+    """(id, updated_at) of each of the user's cases: one narrow SELECT, no relationships."""
+    return db.query(models.Case.id, models.Case.updated_at).filter(models.Case.user_id == user_id).all()
+
+
+def cases_for_context(db, case_ids):
+    if not case_ids:
+        return []
+    return db.query(models.Case).options(*CASE_CONTEXT).filter(models.Case.id.in_(case_ids)).all()
@@ -0,0 +1,244 @@
+import re
+from abc import ABC, abstractmethod
+from .config import settings
+from .prompt_budget import estimate_tokens
+
+# Numbered provisions in the acts start a line, e.g. "303. (1) Whoever..." or "21. Protection of life..."
+SECTION_HEADING = re.compile(r"^\s*(\d{1,3}[A-Z]{0,2})\.\s*(?=[A-Z(—\-])")
+CHAPTER_HEADING = re.compile(r"^\s*CHAPTER\s*([IVXLC]+)\b")
+# Clause and sub-clause openings: "(1) ...", "(a) ...", "(iv) ..."
+CLAUSE_START = re.compile(r"^\s*\((?:\d{1,3}[A-Z]?|[a-z]{1,4})\)\s")
+# A sentence ends at . ; : or ? followed by something that can open a sentence
+SENTENCE_BREAK = re.compile(r"(?<=[.;:?])\s+(?=[A-Z0-9(\"'“‘—])")
+# Pieces that end a "sentence" without ending one: a bare provision number ("21."),
+# a clause label, or an abbreviation ("No.", "Sec.", "i.e.")
+NOT_A_SENTENCE = re.compile(
+    r"^\s*(?:\d{1,3}[A-Z]{0,2}\.|\(\w{1,4}\))\s*$"
+    r"|\b(?:No|Nos|Sec|Secs|S|s|Art|Arts|Cl|cl|ss|i\.e|e\.g|viz|Govt|Ltd|Co|Mr|Mrs|Dr|St|Vol|Ch|Pt)\.$"
+)
+
+
+def _section_meta(section, chapter):
+    # Chroma metadata values cannot be None, so unknown fields are left out
+    meta = {}
+    if section:
+        meta["section"] = section
+    if chapter:
+        meta["chapter"] = chapter
+    return meta
+
+
+class Chunker(ABC):
+    """
+    Splits a stream of (page_number, text) into (page_number, chunk_text, metadata).
+    Chunks never span a page. Metadata carries the section and chapter in force where the
+    chunk starts; both carry over from earlier pages when a page opens mid-section.
+    `signature` identifies the strategy and its settings: the ingest manifest re-chunks
+    a file when it changes.
+    """
+
+    name = "base"
+
+    @property
+    @abstractmethod
+    def signature(self):
+        """Strategy name and settings, e.g. "tokens:256/64/32"."""
+
+    @abstractmethod
+    def chunks(self, pages):
+        """Yields (page_number, chunk_text, metadata) for an iterable of (page_number, text)."""
+
+
+class CharChunker(Chunker):
+    """The original splitter: whole lines, cut once a chunk reaches `max_chars`, no overlap."""
+
+    name = "chars"
+
+    def __init__(self, max_chars=1000):
+        self.max_chars = max_chars
+
+    @property
+    def signature(self):
+        return f"chars:{self.max_chars}"
+
+    def chunks(self, pages):
+        section = chapter = None
+        for page_num, text in pages:
+            lines = []
+            size = 0
+            chunk_meta = _section_meta(section, chapter)
+            for line in text.split("\n"):
+                chapter_match = CHAPTER_HEADING.match(line)
+                if chapter_match:
+                    chapter = chapter_match.group(1)
+                section_match = SECTION_HEADING.match(line)
+                if section_match:
+                    section = section_match.group(1)
+
+                if lines and size + len(line) >= self.max_chars:
+                    yield page_num, "\n".join(lines), chunk_meta
+                    lines, size = [], 0
+                if not lines:
+                    chunk_meta = _section_meta(section, chapter)
+                lines.append(line)
+                size += len(line) + 1
+            if lines:
+                yield page_num, "\n".join(lines), chunk_meta
+
+
+class _Unit:
+    """A sentence or line: the smallest piece the token chunker moves between chunks."""
+
+    __slots__ = ("text", "tokens", "section_start", "clause_start", "section", "chapter", "newline")
+
+    def __init__(self, text, section, chapter, section_start, newline):
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        self.section_start = section_start
+        self.clause_start = bool(CLAUSE_START.match(text))
+        self.section = section
+        self.chapter = chapter
+        self.newline = newline  # Starts a new line in the source text
+
+
+class TokenChunker(Chunker):
+    """
+    Structure-aware chunks sized in (estimated) tokens.
+
+    Text is split into sentences (the Constitution extracts as one long line per page, so
+    lines alone are not enough). A section heading closes the current chunk once it holds
+    `min_tokens`, so sections do not share chunks unless they are short. When a chunk
+    would pass `max_tokens` it is cut at its last clause opening ("(2)", "(b)") if that
+    still leaves `min_tokens`, otherwise at the sentence boundary. The next chunk of the
+    same section repeats up to `overlap_tokens` of trailing sentences for context. A short
+    tail at the end of a page is merged into the previous chunk when it fits.
+    """
+
+    name = "tokens"
+
+    def __init__(self, max_tokens=256, min_tokens=64, overlap_tokens=32):
+        self.max_tokens = max_tokens
+        self.min_tokens = min(min_tokens, max_tokens)
+        self.overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    @property
+    def signature(self):
+        return f"tokens:{self.max_tokens}/{self.min_tokens}/{self.overlap_tokens}"
+
+    def _pieces(self, text):
+        """Sentences of a line, with non-sentence pieces ("21.", "No.") joined to what follows."""
+        pieces = []
+        carry = ""
+        for piece in SENTENCE_BREAK.split(text):
+            piece = carry + piece
+            if NOT_A_SENTENCE.search(piece):
+                carry = piece + " "
+                continue
+            carry = ""
+            pieces.extend(self._split_long(piece))
+        if carry.strip():
+            pieces.extend(self._split_long(carry.strip()))
+        return pieces
+
+    def _split_long(self, text):
+        """A sentence longer than max_tokens, cut into word runs that fit."""
+        if estimate_tokens(text) <= self.max_tokens:
+            return [text]
+        pieces, words = [], []
+        for word in text.split():
+            if words and estimate_tokens(" ".join(words + [word])) > self.max_tokens:
+                pieces.append(" ".join(words))
+                words = []
+            words.append(word)
+        if words:
+            pieces.append(" ".join(words))
+        return pieces
+
+    def _units(self, text, state):
+        for line in text.split("\n"):
+            if not line.strip():
+                continue
+            for index, piece in enumerate(self._pieces(line.strip())):
+                chapter_match = CHAPTER_HEADING.match(piece)
+                if chapter_match:
+                    state["chapter"] = chapter_match.group(1)
+                section_match = SECTION_HEADING.match(piece)
+                if section_match:
+                    state["section"] = section_match.group(1)
+                yield _Unit(piece, state["section"], state["chapter"], bool(section_match), newline=index == 0)
+
+    def _overlap(self, units):
+        """Trailing units of a finished chunk to repeat at the start of the next one."""
+        carried, size = [], 0
+        for unit in reversed(units):
+            if size + unit.tokens > self.overlap_tokens:
+                break
+            carried.insert(0, unit)
+            size += unit.tokens
+            if unit.section_start:
+                break
+        return carried
+
+    def _render(self, units):
+        text = ""
+        for unit in units:
+            if text:
+                text += "\n" if unit.newline else " "
+            text += unit.text
+        return text
+
+    def _page_chunks(self, units):
+        """Lists of (overlap units, new units) for one page."""
+        chunks = []
+        overlap, current, size = [], [], 0
+        for unit in units:
+            if current and unit.section_start and size >= self.min_tokens:
+                chunks.append((overlap, current))
+                overlap, current, size = [], [], 0
+            elif current and size + unit.tokens > self.max_tokens:
+                cut = len(current)
+                for index in range(len(current) - 1, 0, -1):
+                    if current[index].clause_start:
+                        if (sum(u.tokens for u in overlap + current[:index]) >= self.min_tokens
+                                and sum(u.tokens for u in current[index:]) + unit.tokens <= self.max_tokens):
+                            cut = index
+                        break
+                done, rest = current[:cut], current[cut:]
+                chunks.append((overlap, done))
+                overlap = [] if (rest and rest[0].section_start) else self._overlap(done)
+                if sum(u.tokens for u in overlap + rest) + unit.tokens > self.max_tokens:
+                    overlap = []
+                current = rest
+                size = sum(u.tokens for u in overlap + current)
+            current.append(unit)
+            size += unit.tokens
+        if current:
+            tail_size = sum(u.tokens for u in current)
+            if chunks and tail_size < self.min_tokens:
+                prev_overlap, prev = chunks[-1]
+                if sum(u.tokens for u in prev_overlap + prev) + tail_size <= self.max_tokens:
+                    chunks[-1] = (prev_overlap, prev + current)
+                    return chunks
+            chunks.append((overlap, current))
+        return chunks
+
+    def chunks(self, pages):
+        state = {"section": None, "chapter": None}
+        for page_num, text in pages:
+            for overlap, units in self._page_chunks(list(self._units(text, state))):
+                first = units[0]
+                yield page_num, self._render(overlap + units), _section_meta(first.section, first.chapter)
+
+
+def get_chunker(strategy=None):
+    """The chunker selected by CHUNK_STRATEGY ("tokens" or "chars")."""
+    strategy = (strategy or settings.CHUNK_STRATEGY).strip().lower()
+    if strategy == "chars":
+        return CharChunker(max_chars=settings.CHUNK_MAX_CHARS)
+    if strategy == "tokens":
+        return TokenChunker(
+            max_tokens=settings.CHUNK_MAX_TOKENS,
+            min_tokens=settings.CHUNK_MIN_TOKENS,
+            overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+        )
+    raise ValueError(f"Unknown CHUNK_STRATEGY {strategy!r} (expected 'tokens' or 'chars')")
@@ -11,5 +11,107 @@ class Settings:
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
     CHROMA_DB_DIR = "chroma_db_store"
     DATA_DIR = "data"
+    CACHE_DIR = os.getenv("CACHE_DIR", "cache_store")
+
+    # Max concurrent blocking model calls issued from async endpoints
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+    # Generation models per task, in preference order (comma-separated env overrides).
+    # The model router sends each call to the fastest healthy model of its task.
+    LLM_MODELS = [m.strip() for m in os.getenv("LLM_MODELS", "gemini-3-flash-preview,gemini-2.5-flash,gemini-1.5-flash").split(",") if m.strip()]
+    LLM_TASK_MODELS = {
+        "default": LLM_MODELS,
+        "chat": [m.strip() for m in os.getenv("LLM_CHAT_MODELS", "").split(",") if m.strip()] or LLM_MODELS,
+        "judicial": [m.strip() for m in os.getenv("LLM_JUDICIAL_MODELS", "").split(",") if m.strip()] or LLM_MODELS,
+        "transcribe": [m.strip() for m in os.getenv("LLM_TRANSCRIBE_MODELS", "").split(",") if m.strip()] or LLM_MODELS,
+        "simplify": [m.strip() for m in os.getenv("LLM_SIMPLIFY_MODELS", "").split(",") if m.strip()] or LLM_MODELS,
+        "summarize": [m.strip() for m in os.getenv("LLM_SUMMARIZE_MODELS", "").split(",") if m.strip()] or LLM_MODELS,
+    }
+    MODEL_FAILURE_THRESHOLD = int(os.getenv("MODEL_FAILURE_THRESHOLD", "3"))  # Consecutive failures that open a circuit
+    MODEL_CIRCUIT_COOLDOWN = float(os.getenv("MODEL_CIRCUIT_COOLDOWN", "30"))  # Seconds before a probe request
+
+    # Cached per-case prompt context, keyed by (case id, updated_at)
+    CASE_CONTEXT_CACHE_SIZE = int(os.getenv("CASE_CONTEXT_CACHE_SIZE", "512"))
+
+    # Token budget for assembled chat/judicial prompts (estimated tokens)
+    PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+
+    # Rolling conversation summary: prompts carry the session summary plus the messages not
+    # yet folded into it. Once CHAT_RECENT_MESSAGES + 2 * CHAT_SUMMARY_EVERY_TURNS messages
+    # are unsummarized, all but the most recent CHAT_RECENT_MESSAGES are folded in (in the background).
+    CHAT_RECENT_MESSAGES = int(os.getenv("CHAT_RECENT_MESSAGES", "4"))
+    CHAT_SUMMARY_EVERY_TURNS = int(os.getenv("CHAT_SUMMARY_EVERY_TURNS", "3"))
+
+    # Hedged requests (opt-in): race the next model when the first is slower than its usual latency
+    LLM_HEDGING = os.getenv("LLM_HEDGING", "false").strip().lower() in ("1", "true", "yes")
+    LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "5"))  # Seconds, until latency is measured
+
+    # Embeddings: "gemini" (text-embedding-004 over the network) or "local" (in-process hashing model)
+    EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "gemini").strip().lower()
+    LOCAL_EMBEDDING_DIM = int(os.getenv("LOCAL_EMBEDDING_DIM", "768"))
+
+    # Vector search engine: "chroma" (PersistentClient) or "mmap" (read-only float16 matrix,
+    # memory-mapped and shared by all workers; rebuilt from Chroma by backend/ingest.py)
+    VECTOR_ENGINE = os.getenv("VECTOR_ENGINE", "chroma").strip().lower()
+    VECTOR_INDEX_DIR = os.path.join(CHROMA_DB_DIR, "vector_index")
+
+    # Ingestion pipeline tuning
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "50"))  # Gemini caps batch embeds at 100
+    EMBED_MAX_WORKERS = int(os.getenv("EMBED_MAX_WORKERS", "4"))
+    CHROMA_WRITE_BATCH_SIZE = int(os.getenv("CHROMA_WRITE_BATCH_SIZE", "200"))
+    PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0")) or None  # None = min(4, CPUs)
+    # Chunking: "tokens" (sentence/clause-aware, sized in estimated tokens, with overlap) or "chars" (the original line splitter)
+    CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "tokens")
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+    CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", "64"))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+    CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1000"))  # "chars" strategy only
+    INGEST_MANIFEST_PATH = os.path.join(CHROMA_DB_DIR, "ingest_manifest.json")
+    STATUTE_INDEX_PATH = os.path.join(CHROMA_DB_DIR, "statute_index.json.gz")  # Section/article lookup
+    LEXICAL_INDEX_PATH = os.path.join(CHROMA_DB_DIR, "lexical_index.json.gz")  # BM25 over the same chunks
+
+    # Retrieval re-ranking: over-fetch candidates, drop near-duplicates, MMR with an adaptive k
+    RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "20"))
+    RETRIEVAL_MMR_LAMBDA = float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.7"))  # 1 = relevance only, 0 = diversity only
+    RETRIEVAL_DUPLICATE_THRESHOLD = float(os.getenv("RETRIEVAL_DUPLICATE_THRESHOLD", "0.95"))  # Cosine similarity
+    RETRIEVAL_MIN_RELATIVE_SCORE = float(os.getenv("RETRIEVAL_MIN_RELATIVE_SCORE", "0.8"))  # Of the best hit's relevance
+
+    # Document simplification: PDF pages with fewer letters/digits than this in their
+    # extracted text are treated as scanned and sent to Gemini as a page image instead
+    DOC_MIN_PAGE_TEXT_CHARS = int(os.getenv("DOC_MIN_PAGE_TEXT_CHARS", "40"))
+    # Map-reduce for long PDFs: documents over DOC_MAP_REDUCE_PAGES pages are summarized in
+    # windows of DOC_WINDOW_PAGES pages (at most DOC_MAP_WORKERS at once across all
+    # requests), then the window summaries are combined in the user's language
+    DOC_MAP_REDUCE_PAGES = int(os.getenv("DOC_MAP_REDUCE_PAGES", "12"))
+    DOC_WINDOW_PAGES = int(os.getenv("DOC_WINDOW_PAGES", "8"))
+    DOC_MAP_WORKERS = int(os.getenv("DOC_MAP_WORKERS", "4"))
+
+    # Simplified-document results, keyed by file hash + language + prompt version
+    # (in-process LRU in front of a SQLite file shared by workers)
+    DOC_CACHE_PATH = os.path.join(CACHE_DIR, "simplified_documents.sqlite3")
+    DOC_CACHE_SIZE = int(os.getenv("DOC_CACHE_SIZE", "256"))
+    DOC_CACHE_MAX_ENTRIES = int(os.getenv("DOC_CACHE_MAX_ENTRIES", "10000"))
+
+    # Background jobs for the long-running tools (POST /jobs/<tool>, then poll or stream
+    # GET /jobs/<id>): worker threads per tool, per process
+    JOB_WORKERS = {
+        "simplify_doc": int(os.getenv("JOB_SIMPLIFY_WORKERS", "2")),
+        "generate_draft": int(os.getenv("JOB_DRAFT_WORKERS", "4")),
+        "transcribe": int(os.getenv("JOB_TRANSCRIBE_WORKERS", "4")),
+    }
+    JOB_HEARTBEAT_SECONDS = int(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))  # How often running jobs are marked alive
+    JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "90"))  # A running job silent this long was orphaned by a crash
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETENTION_HOURS = int(os.getenv("JOB_RETENTION_HOURS", "168"))  # Finished jobs are deleted after this
+
+    # Query embedding cache (in-process LRU in front of a SQLite file shared by workers)
+    EMBEDDING_CACHE_PATH = os.path.join(CACHE_DIR, "query_embeddings.sqlite3")
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+
+    # Semantic answer cache for stand-alone query_rag questions
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # Cosine similarity
+    ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "3600"))  # Seconds
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
 
 settings = Settings()
@@ -0,0 +1,118 @@
+import logging
+import threading
+from .config import settings
+from . import database, llm_executor, model_router, rag_engine
+
+logger = logging.getLogger(__name__)
+
+# Rolling conversation summary for chat sessions. A session's `summary` covers every
+# message up to `summarized_through`; prompts carry that summary plus the messages after
+# it. After a reply is stored, `summarize_in_background` folds the older unsummarized
+# messages into the summary once enough of them have piled up, so the prompt stays short
+# however long the consultation runs.
+
+SUMMARY_GENERATION_CONFIG = dict(
+    candidate_count=1,
+    max_output_tokens=512,
+    temperature=0.2,
+)
+
+SUMMARY_PROMPT = """You maintain the running summary of a legal consultation between a user and NyayaSetu, an Indian legal assistant.
+Update the summary with the new messages below. Keep every fact that later answers may depend on:
+the user's situation and goals, names, dates, amounts, case details, the laws and sections discussed,
+advice already given and open questions. Drop greetings and repetition. Write at most 200 words of
+plain prose in English, in the third person ("The user...").
+
+CURRENT SUMMARY:
+{summary}
+
+NEW MESSAGES:
+{messages}
+
+UPDATED SUMMARY:
+"""
+
+MAX_MESSAGE_CHARS = 2000  # Per message fed to the summarizer; long answers are clipped
+
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def summary_threshold():
+    """Unsummarized messages at which the older ones get folded into the summary."""
+    return settings.CHAT_RECENT_MESSAGES + 2 * settings.CHAT_SUMMARY_EVERY_TURNS
+
+
+def recent_history(db, message_model, session, exclude_id=None):
+    """The messages not yet covered by the session summary, oldest first, as prompt history."""
+    query = db.query(message_model).filter(message_model.session_id == session.id)
+    if session.summarized_through:
+        query = query.filter(message_model.id > session.summarized_through)
+    messages = query.order_by(message_model.id.desc()).limit(summary_threshold() + 1).all()
+    messages.reverse()
+    return [{"role": msg.role, "content": msg.content} for msg in messages if msg.id != exclude_id][-summary_threshold():]
+
+
+def update_summary(session_model, message_model, session_id):
+    """Folds all but the most recent messages into the session summary, if enough are pending."""
+    db = database.SessionLocal()
+    try:
+        session = db.query(session_model).filter(session_model.id == session_id).first()
+        if not session:
+            return
+        previous_through = session.summarized_through
+        query = db.query(message_model).filter(message_model.session_id == session_id)
+        if previous_through:
+            query = query.filter(message_model.id > previous_through)
+        pending = query.order_by(message_model.id).all()
+        if len(pending) < summary_threshold():
+            return
+
+        fold = pending[:len(pending) - settings.CHAT_RECENT_MESSAGES]
+        transcript = "".join(
+            f"{'User' if msg.role == 'user' else 'NyayaSetu'}: {(msg.content or '')[:MAX_MESSAGE_CHARS]}\n"
+            for msg in fold
+        )
+        prompt = SUMMARY_PROMPT.format(summary=session.summary or "(none yet)", messages=transcript)
+        summary = model_router.router.call(
+            "summarize", lambda model_name: rag_engine.generate_text(model_name, prompt, SUMMARY_GENERATION_CONFIG)
+        ).strip()
+        if not summary:
+            return
+
+        # Conditional update: if another worker summarized this session meanwhile, keep its result
+        updated = db.query(session_model).filter(
+            session_model.id == session_id,
+            session_model.summarized_through == previous_through if previous_through else session_model.summarized_through.is_(None),
+        ).update({"summary": summary, "summarized_through": fold[-1].id}, synchronize_session=False)
+        db.commit()
+        if updated:
+            logger.info(f"Summarized {len(fold)} messages of {session_model.__tablename__} #{session_id}")
+    except model_router.AllModelsUnavailable as e:
+        logger.warning(f"Conversation summary skipped for {session_model.__tablename__} #{session_id}: {e}")
+    except Exception as e:
+        logger.error(f"Conversation summary failed for {session_model.__tablename__} #{session_id}: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
+def summarize_in_background(session_model, message_model, session_id):
+    """Schedules `update_summary` on the LLM pool; at most one run per session at a time."""
+    key = (session_model.__tablename__, session_id)
+    with _in_flight_lock:
+        if key in _in_flight:
+            return
+        _in_flight.add(key)
+
+    def run():
+        try:
+            update_summary(session_model, message_model, session_id)
+        finally:
+            with _in_flight_lock:
+                _in_flight.discard(key)
+
+    try:
+        llm_executor.submit(run)
+    except RuntimeError:  # Pool already shut down
+        with _in_flight_lock:
+            _in_flight.discard(key)
@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -16,6 +16,31 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def add_missing_columns(bind):
+    """
+    create_all() creates missing tables but never alters existing ones. This adds
+    columns that a model has gained since its table was created, which is enough for
+    the nullable columns added so far; anything more needs a real migration.
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+def init_db():
+    """Creates missing tables and columns. Run once at startup, not at import."""
+    from . import models  # Registers the tables on Base
+    models.Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
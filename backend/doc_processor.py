@@ -1,39 +1,53 @@
-import google.generativeai as genai
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .config import settings
+from . import model_router, resources, pdf_extract
+from .document_cache import DocumentCache
 
-# Configure API
-genai.configure(api_key=settings.GEMINI_API_KEY)
+logger = logging.getLogger(__name__)
 
-def simplify_document(file_content: bytes, mime_type: str, language: str = "en") -> str:
-    """
-    Analyzes an uploaded image/PDF using Gemini Vision and returns a simplified summary.
-    """
-    # Model List with Fallback Priority
-    models_to_try = ["gemini-3-flash-preview", "gemini-2.5-flash", "gemini-1.5-flash"]
-    
-    # Language Handling
-    lang_instruction = "English"
-    if language == "hi":
-        lang_instruction = "Hindi (हिंदी)"
-    elif language == "bn":
-        lang_instruction = "Bengali (বাংলা)"
-    elif language == "te":
-        lang_instruction = "Telugu (తెలుగు)"
-
-    prompt = f"""
+# Text-based PDFs (most court notices) are read locally with pypdf and sent to Gemini as
+# text; only pages with no usable text layer (scans, photos) go as a one-page PDF for the
+# vision model, and images always do. Consecutive scanned pages share one attachment.
+#
+# Long PDFs are summarized map-reduce: page windows are summarized concurrently (map),
+# then one call explains the whole document from the window summaries (reduce).
+
+_stats_lock = threading.Lock()
+_page_counts = {"text_pages": 0, "scanned_pages": 0, "images": 0, "unreadable_pdfs": 0, "map_reduce_documents": 0}
+
+# Bump whenever a prompt below changes, so cached results from the old prompts are not served
+PROMPT_VERSION = 1
+
+document_cache = DocumentCache(
+    settings.DOC_CACHE_PATH, memory_size=settings.DOC_CACHE_SIZE, max_disk_entries=settings.DOC_CACHE_MAX_ENTRIES
+)
+
+# Shared by all requests, so concurrent uploads cannot multiply the window calls in flight
+_map_pool = ThreadPoolExecutor(max_workers=settings.DOC_MAP_WORKERS, thread_name_prefix="simplify-map")
+
+LANGUAGES = {
+    "en": "English",
+    "hi": "Hindi (हिंदी)",
+    "bn": "Bengali (বাংলা)",
+    "te": "Telugu (తెలుగు)",
+}
+
+SIMPLIFY_PROMPT = """
     You are SamvidhanSetu, a friendly and wise legal assistant who helps ordinary people understand complex official documents.
 
     Task:
-    1. Analyze the attached legal document image/PDF.
+    1. Analyze the legal document below ({source}).
     2. **DO NOT simply extract or transcribe text.** Your goal is to EXPLAIN what it means.
     3. Identify what kind of document this is (e.g., "Rent Agreement", "Court Notice", "Traffic Ticket").
     4. Summarize the content in extremely **SIMPLE, EVERYDAY LANGUAGE** (Explain Like I'm 5).
     5. Avoid legal jargon completely. If a legal term is necessary, explain it in brackets.
-    6. Provide the output in **{lang_instruction}**.
+    6. Provide the output in **{language}**.
 
     Format:
     - **Document Type**: [What is this?]
-    - **What it Says (Simply)**: 
+    - **What it Says (Simply)**:
         * [Point 1 - The core meaning]
         * [Point 2 - Important detail]
     - **Why it Matters**: [One sentence on the legal implication]
@@ -42,19 +56,196 @@ def simplify_document(file_content: bytes, mime_type: str, language: str = "en")
     If the image is not clear or not a document, say "I cannot read this document clearly."
     """
 
-    # Create the Content part
-    image_part = {
-        "mime_type": mime_type,
-        "data": file_content
-    }
+WHOLE_DOCUMENT = "pages with readable text are given as text, scanned pages are attached"
+WINDOW_SUMMARIES = "given as notes on consecutive page ranges, in order, because the document is long"
+
+MAP_PROMPT = """You are reading pages {first}-{last} of a {total}-page legal document, which will later be explained
+to an ordinary person from notes like yours on every part of it. Write the notes for these pages in English:
+the kind of document (if these pages show it), parties, dates and deadlines, amounts, sections of law cited,
+findings, orders or directions, and anything someone must do. Short bullet points, at most 250 words.
+Do not explain or simplify yet, and do not invent anything that is not on these pages.
+"""
+
+
+def _count(**increments):
+    with _stats_lock:
+        for key, value in increments.items():
+            _page_counts[key] += value
+
+
+def stats():
+    """How uploaded pages were sent to the model, for /admin/stats."""
+    with _stats_lock:
+        return dict(_page_counts)
+
+
+def _has_text(text):
+    return sum(ch.isalnum() for ch in text) >= settings.DOC_MIN_PAGE_TEXT_CHARS
+
+
+class LocalPdfError(Exception):
+    """The upload opened as a PDF but its pages could not be extracted or rewritten locally."""
+
+
+def _open_pdf(file_content):
+    """A pypdf reader over the upload, or None if pypdf cannot open it."""
+    try:
+        reader = pdf_extract.read_pdf_bytes(file_content)
+        len(reader.pages)  # Parses the page tree, so a broken file fails here
+        return reader
+    except Exception as e:
+        logger.warning(f"Could not read uploaded PDF locally, sending it whole: {e}")
+        _count(unreadable_pdfs=1)
+        return None
+
+
+def _page_parts(reader, start, end):
+    """
+    generate_content parts for pages [start, end): their extracted text, and an
+    attachment per run of scanned pages. Raises LocalPdfError if pypdf fails on them.
+    """
+    try:
+        return _build_page_parts(reader, start, end)
+    except Exception as e:
+        logger.warning(f"Could not prepare PDF pages {start + 1}-{end} locally, sending the upload whole: {e}")
+        _count(unreadable_pdfs=1)
+        raise LocalPdfError(str(e)) from e
+
+
+def _build_page_parts(reader, start, end):
+    texts = {index: pdf_extract.page_text(reader, index) for index in range(start, end)}
+    parts, text_run, scanned_run = [], [], []
+
+    def flush_text():
+        if text_run:
+            parts.append("\n\n".join(text_run))
+            text_run.clear()
+
+    def flush_scanned():
+        if scanned_run:
+            first, last = scanned_run[0] + 1, scanned_run[-1] + 1
+            label = f"Page {first}" if first == last else f"Pages {first}-{last}"
+            parts.append(f"--- {label} (scanned, attached) ---")
+            parts.append({"mime_type": "application/pdf", "data": pdf_extract.pages_as_pdf(reader, scanned_run)})
+            scanned_run.clear()
+
+    scanned = 0
+    for index in range(start, end):
+        if _has_text(texts[index]):
+            flush_scanned()
+            text_run.append(f"--- Page {index + 1} ---\n{texts[index].strip()}")
+        else:
+            flush_text()
+            scanned_run.append(index)
+            scanned += 1
+    flush_text()
+    flush_scanned()
+    _count(text_pages=end - start - scanned, scanned_pages=scanned)
+    return parts
+
 
-    for model_name in models_to_try:
+def _generate(parts):
+    # The model router picks the fastest healthy model and skips ones whose circuit is open
+    def generate(model_name):
+        model = resources.genai().GenerativeModel(model_name)
+        return model.generate_content(parts).text
+    return model_router.router.call("simplify", generate)
+
+
+def _report(progress, **event):
+    if progress:
         try:
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content([prompt, image_part])
-            return response.text
+            progress(event)
         except Exception as e:
-            print(f"Model {model_name} failed: {e}")
-            continue
-            
-    return "Error: Could not process document with any available AI models."
+            logger.warning(f"Simplify progress callback failed: {e}")
+
+
+def _map_reduce(reader, prompt_language, progress=None):
+    """
+    Summarizes page windows concurrently, then explains the document from those notes.
+    Returns (summary, whether every window was summarized).
+    """
+    total = len(reader.pages)
+    size = max(1, settings.DOC_WINDOW_PAGES)
+    windows = [(start, min(start + size, total)) for start in range(0, total, size)]
+    _count(map_reduce_documents=1)
+    _report(progress, stage="map", completed=0, windows=len(windows))
+
+    # Parts are built here, not in the pool, since the pypdf reader is not thread-safe. Each
+    # window is submitted as soon as its pages are extracted, so the model is already
+    # working on the first windows while later pages are still being read.
+    notes = [None] * len(windows)
+    futures = {}
+    for position, (start, end) in enumerate(windows):
+        try:
+            parts = _page_parts(reader, start, end)
+        except LocalPdfError:
+            for future in futures:
+                future.cancel()  # The caller falls back to the whole upload
+            raise
+        futures[_map_pool.submit(_generate, [MAP_PROMPT.format(first=start + 1, last=end, total=total), *parts])] = position
+    completed = 0
+    for future in as_completed(futures):
+        position = futures[future]
+        start, end = windows[position]
+        try:
+            notes[position] = future.result().strip()
+            status = "done"
+        except Exception as e:
+            logger.warning(f"Summary of pages {start + 1}-{end} failed: {e}")
+            status = "failed"
+        completed += 1
+        _report(progress, stage="map", window=position + 1, pages=[start + 1, end], status=status,
+                completed=completed, windows=len(windows))
+
+    if not any(notes):
+        raise model_router.AllModelsUnavailable("No page window could be summarized")
+    sections = [
+        f"--- Pages {start + 1}-{end} ---\n{note or '(These pages could not be read.)'}"
+        for (start, end), note in zip(windows, notes)
+    ]
+    _report(progress, stage="reduce", completed=completed, windows=len(windows))
+    prompt = SIMPLIFY_PROMPT.format(source=WINDOW_SUMMARIES, language=prompt_language)
+    return _generate([prompt, "\n\n".join(sections)]), all(notes)
+
+
+def simplify_document(file_content: bytes, mime_type: str, language: str = "en", progress=None) -> str:
+    """
+    Analyzes an uploaded image/PDF using Gemini and returns a simplified summary.
+    PDF text is extracted locally; only scanned pages and images go to the vision model.
+    PDFs longer than DOC_MAP_REDUCE_PAGES are summarized map-reduce, calling `progress`
+    (if given) with a dict per finished page window and once before the final step.
+    Results are cached by file content, so a repeat upload costs no model call.
+    """
+    language = language if language in LANGUAGES else "en"
+    lang_instruction = LANGUAGES[language]
+    cached = document_cache.get(file_content, language, PROMPT_VERSION)
+    if cached is not None:
+        return cached
+
+    try:
+        # Whatever cannot be prepared locally is sent to the model as the original upload
+        parts = [{"mime_type": mime_type, "data": file_content}]
+        if mime_type == "application/pdf":
+            reader = _open_pdf(file_content)
+            try:
+                if reader is not None and len(reader.pages) > settings.DOC_MAP_REDUCE_PAGES:
+                    summary, complete = _map_reduce(reader, lang_instruction, progress)
+                    if summary and complete:  # A summary missing some pages is not worth keeping
+                        document_cache.put(file_content, language, PROMPT_VERSION, summary)
+                    return summary
+                if reader is not None:
+                    parts = _page_parts(reader, 0, len(reader.pages))
+            except LocalPdfError:
+                pass
+        else:
+            _count(images=1)
+
+        prompt = SIMPLIFY_PROMPT.format(source=WHOLE_DOCUMENT, language=lang_instruction)
+        summary = _generate([prompt, *parts])
+        if summary:
+            document_cache.put(file_content, language, PROMPT_VERSION, summary)
+        return summary
+    except model_router.AllModelsUnavailable as e:
+        logger.warning(f"Document simplification failed: {e}")
+        return "Error: Could not process document with any available AI models."
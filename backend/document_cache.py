@@ -0,0 +1,31 @@
+import hashlib
+from .caching import TwoTierCache
+
+
+class DocumentCache(TwoTierCache):
+    """
+    Simplified-document results keyed by content: SHA-256 of the uploaded bytes, the
+    output language and the prompt version, so a re-upload of the same notice is
+    answered without a model call and a prompt change never serves stale summaries.
+    The SQLite file keeps at most `max_disk_entries` results, dropping the oldest.
+    """
+
+    def __init__(self, path, memory_size=256, max_disk_entries=10_000):
+        super().__init__(path, "simplified_documents", memory_size=memory_size, max_disk_entries=max_disk_entries)
+
+    @staticmethod
+    def make_key(content: bytes, language: str, prompt_version) -> str:
+        digest = hashlib.sha256(content).hexdigest()
+        return f"{digest}:{language}:v{prompt_version}"
+
+    def encode(self, result):
+        return result.encode("utf-8")
+
+    def decode(self, blob):
+        return blob.decode("utf-8")
+
+    def get(self, content: bytes, language: str, prompt_version):
+        return self.lookup(self.make_key(content, language, prompt_version))
+
+    def put(self, content: bytes, language: str, prompt_version, result: str):
+        self.store(self.make_key(content, language, prompt_version), result)
@@ -0,0 +1,42 @@
+import re
+import hashlib
+import unicodedata
+from array import array
+from .caching import TwoTierCache
+
+
+def normalize_query(text: str) -> str:
+    """
+    Canonical form used as the cache key, so "What is Section 420?" and
+    "what is  section 420" share one embedding.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?.!। ")
+
+
+class EmbeddingCache(TwoTierCache):
+    """
+    Two-tier cache for query embeddings: a bounded in-process LRU in front of a
+    SQLite file shared by all workers. Keys include the embedding model, so a
+    model change never serves stale vectors.
+    """
+
+    def __init__(self, path, memory_size=2048, max_disk_entries=100_000):
+        super().__init__(path, "query_embeddings", memory_size=memory_size, max_disk_entries=max_disk_entries)
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\n{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+    def encode(self, embedding):
+        return array("f", embedding).tobytes()
+
+    def decode(self, blob):
+        return array("f", blob).tolist()
+
+    def get(self, model: str, text: str):
+        return self.lookup(self.make_key(model, text))
+
+    def put(self, model: str, text: str, embedding):
+        self.store(self.make_key(model, text), embedding)
@@ -0,0 +1,154 @@
+import os
+import re
+import math
+import time
+import zlib
+import logging
+from abc import ABC, abstractmethod
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingProvider(ABC):
+    """
+    Interface shared by ingestion and query-time retrieval.
+    `name` identifies the vector space: vectors from different providers are never mixed,
+    each provider gets its own Chroma collection tagged with this name.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def embed_documents(self, texts):
+        """Embeddings for a batch of chunks, in order. Returns [] on failure."""
+
+    @abstractmethod
+    def embed_query(self, text):
+        """Embedding for a search query. Returns None on failure."""
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """Gemini text-embedding-004 over the network, with exponential backoff on 429s."""
+
+    name = "gemini-text-embedding-004"
+    model = "models/text-embedding-004"
+
+    def __init__(self, retries=3):
+        self.retries = retries
+
+    def _embed(self, content, task_type):
+        from .resources import genai
+
+        for attempt in range(self.retries):
+            try:
+                return genai().embed_content(model=self.model, content=content, task_type=task_type)['embedding']
+            except Exception as e:
+                if "429" in str(e) and attempt < self.retries - 1:
+                    wait_time = 2 * (2 ** attempt)  # Exponential backoff: 2s, 4s, 8s
+                    logger.warning(f"Rate limit hit (429). Retrying in {wait_time}s...")
+                    time.sleep(wait_time)
+                else:
+                    print(f"Error generating embedding: {e}")
+                    return None
+        return None
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts), "retrieval_document") or []
+
+    def embed_query(self, text):
+        return self._embed(text, "retrieval_query")
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Offline, in-process CPU embeddings via signed feature hashing of words, word
+    bigrams and character trigrams (the trigrams give some robustness to spelling
+    and inflection). No model download, no network, deterministic across processes;
+    a query embeds in well under a millisecond. Lower quality than Gemini, so it is
+    meant for offline use, development and tests.
+    """
+
+    TOKEN = re.compile(r"\w+", re.UNICODE)
+    WEIGHTS = {"w": 1.0, "b": 0.7, "c": 0.3}
+
+    def __init__(self, dim=768):
+        self.dim = dim
+        self.name = f"local-hashing-{dim}"
+
+    def _features(self, text):
+        tokens = self.TOKEN.findall(text.casefold())
+        for token in tokens:
+            yield "w", token
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                yield "c", padded[i:i + 3]
+        for first, second in zip(tokens, tokens[1:]):
+            yield "b", f"{first} {second}"
+
+    def _embed(self, text):
+        vector = [0.0] * self.dim
+        for kind, feature in self._features(text):
+            # crc32 is stable across processes, unlike the salted built-in hash()
+            digest = zlib.crc32(f"{kind}:{feature}".encode("utf-8"))
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % self.dim] += sign * self.WEIGHTS[kind]
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+_provider = None
+
+
+def get_provider():
+    """The provider selected by EMBEDDING_PROVIDER ("gemini" or "local"), created once per process."""
+    global _provider
+    if _provider is None:
+        if settings.EMBEDDING_PROVIDER == "local":
+            _provider = HashingEmbeddingProvider(dim=settings.LOCAL_EMBEDDING_DIM)
+        elif settings.EMBEDDING_PROVIDER == "gemini":
+            _provider = GeminiEmbeddingProvider()
+        else:
+            raise ValueError(f"Unknown EMBEDDING_PROVIDER: {settings.EMBEDDING_PROVIDER!r}")
+    return _provider
+
+
+def collection_name(provider):
+    # The Gemini collection keeps its original name so existing stores stay valid
+    if isinstance(provider, GeminiEmbeddingProvider):
+        return "legal_docs"
+    return f"legal_docs__{provider.name}"
+
+
+def get_collection(chroma_client, provider=None):
+    """The Chroma collection for a provider, tagged with the provider that builds it."""
+    provider = provider or get_provider()
+    collection = chroma_client.get_or_create_collection(
+        name=collection_name(provider),
+        metadata={"embedding_provider": provider.name},
+    )
+    built_by = (collection.metadata or {}).get("embedding_provider")
+    if built_by and built_by != provider.name:
+        logger.warning(f"Collection {collection.name} was built by {built_by}, not {provider.name}")
+    return collection
+
+
+def vector_index_path(provider=None):
+    """Base path of the memory-mapped index built from a provider's collection (see vector_index)."""
+    provider = provider or get_provider()
+    return os.path.join(settings.VECTOR_INDEX_DIR, collection_name(provider))
+
+
+def manifest_path(provider=None):
+    """Each collection has its own ingest manifest, since it records what that collection holds."""
+    provider = provider or get_provider()
+    if isinstance(provider, GeminiEmbeddingProvider):
+        return settings.INGEST_MANIFEST_PATH
+    root, ext = settings.INGEST_MANIFEST_PATH.rsplit(".", 1)
+    return f"{root}__{provider.name}.{ext}"
@@ -1,9 +1,5 @@
-import google.generativeai as genai
 from .config import settings
-
-# Configure Gemini
-if settings.GEMINI_API_KEY:
-    genai.configure(api_key=settings.GEMINI_API_KEY)
+from . import resources
 
 def generate_draft(case_type: str, user_details: str, language: str = "en") -> str:
     """
@@ -12,7 +8,7 @@ def generate_draft(case_type: str, user_details: str, language: str = "en") -> s
     if not settings.GEMINI_API_KEY:
         return "Error: GEMINI_API_KEY not found."
 
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    model = resources.genai().GenerativeModel('gemini-2.5-flash')
 
     lang_map = {
         "en": "English", "hi": "Hindi", "bn": "Bengali", "te": "Telugu"
@@ -5,6 +5,8 @@ os.environ.pop('CURL_CA_BUNDLE', None)
 import sys
 import time
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
@@ -13,40 +15,108 @@ logger = logging.getLogger(__name__)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.config import settings
+from backend.ingest_manifest import IngestManifest, file_sha256, chunk_id
 
 import google.generativeai as genai
 import chromadb
-from pypdf import PdfReader
 from chromadb.utils import embedding_functions
+from backend.pdf_extract import iter_pdf_pages
+from backend import lexical_index, embeddings
+from backend.vector_index import MmapVectorIndex
+from backend.chunking import get_chunker
+from backend.statute_index import StatuteIndex, StatuteParser, act_code
 
 # Configure Gemini
 if settings.GEMINI_API_KEY:
     genai.configure(api_key=settings.GEMINI_API_KEY)
 
-# Initialize Chroma
+# Initialize Chroma (one collection per embedding provider)
+embedding_provider = embeddings.get_provider()
 chroma_client = chromadb.PersistentClient(path=settings.CHROMA_DB_DIR)
-collection = chroma_client.get_or_create_collection(name="legal_docs")
+collection = embeddings.get_collection(chroma_client, embedding_provider)
 
-def get_gemini_embedding(text):
-    """Fetch embeddings using Gemini API with retry logic"""
-    retries = 3
-    for attempt in range(retries):
+
+class EmbeddingPipeline:
+    """
+    Buffers chunks into embedding batches, embeds them on a bounded pool of
+    worker threads and writes the results to Chroma in large batches.
+    Chroma writes always happen on the calling thread.
+    """
+
+    def __init__(self, batch_size=None, max_workers=None, write_batch_size=None, on_write=None):
+        self.batch_size = batch_size or settings.EMBED_BATCH_SIZE
+        self.max_workers = max_workers or settings.EMBED_MAX_WORKERS
+        self.write_batch_size = write_batch_size or settings.CHROMA_WRITE_BATCH_SIZE
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._in_flight = deque()
+        self._pending = []  # Chunks waiting to fill an embedding batch
+        self._to_write = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+        self._seen_ids = set()
+        self.on_write = on_write  # Called with (ids, metadatas) after each Chroma write
+        self.stored = 0
+        self.failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
         try:
-            result = genai.embed_content(
-                model="models/text-embedding-004",
-                content=text,
-                task_type="retrieval_document"
-            )
-            return result['embedding']
-        except Exception as e:
-            if "429" in str(e) and attempt < retries - 1:
-                wait_time = 2 * (2 ** attempt)
-                logger.warning(f"Rate limit hit. Retrying in {wait_time}s...")
-                time.sleep(wait_time)
-            elif attempt == retries - 1:
-                print(f"Error generating embedding: {e}")
-                return []
-    return []
+            if exc_type is None:
+                self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def add(self, doc_id, text, metadata):
+        if doc_id in self._seen_ids:  # Chroma rejects duplicate IDs inside one add()
+            return
+        self._seen_ids.add(doc_id)
+        self._pending.append((doc_id, text, metadata))
+        if len(self._pending) >= self.batch_size:
+            self._submit_pending()
+
+    def flush(self):
+        """Embed everything still buffered and write it to Chroma."""
+        self._submit_pending()
+        while self._in_flight:
+            self._collect(self._in_flight.popleft())
+        self._write()
+
+    def _submit_pending(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        # Bound the number of in-flight batches so memory stays proportional to the pool
+        while len(self._in_flight) >= self.max_workers * 2:
+            self._collect(self._in_flight.popleft())
+        future = self._executor.submit(embedding_provider.embed_documents, [text for _, text, _ in batch])
+        self._in_flight.append((future, batch))
+
+    def _collect(self, item):
+        future, batch = item
+        embeddings = future.result()
+        if not embeddings or len(embeddings) != len(batch):
+            self.failed += len(batch)
+            print(f"  Skipped batch of {len(batch)} chunks (embedding failed)")
+            return
+        for (doc_id, text, metadata), embedding in zip(batch, embeddings):
+            self._to_write["ids"].append(doc_id)
+            self._to_write["documents"].append(text)
+            self._to_write["metadatas"].append(metadata)
+            self._to_write["embeddings"].append(embedding)
+        if len(self._to_write["ids"]) >= self.write_batch_size:
+            self._write()
+
+    def _write(self):
+        if not self._to_write["ids"]:
+            return
+        # upsert keeps the write idempotent if a crashed run already stored some of these IDs
+        collection.upsert(**self._to_write)
+        if self.on_write:
+            self.on_write(self._to_write["ids"], self._to_write["metadatas"])
+        count = len(self._to_write["ids"])
+        self.stored += count
+        print(f"  Stored {count} chunks ({self.stored} total)")
+        self._to_write = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
 
 def ingest_data():
     if not os.path.exists(settings.DATA_DIR):
@@ -60,79 +130,154 @@ def ingest_data():
         print("No PDF or TXT files found.")
         return
 
-    for filename in files:
-        filepath = os.path.join(settings.DATA_DIR, filename)
-        print(f"Processing {filename}...")
-        
-        try:
-            text_buffer = ""
-            
-            if filename.lower().endswith('.pdf'):
-                reader = PdfReader(filepath)
-                for page in reader.pages:
-                    content = page.extract_text()
-                    if content:
-                        text_buffer += content + "\n\n"
-            else: # .txt
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    text_buffer = f.read()
-
-            if not text_buffer:
-                continue
-                
-            # Chunking: logic to split large pages
-            # We'll just take page-sized chunks for simplicity in V1
-            # or split by paragraphs if possible.
-            
-            # Let's do a simple recursive-like split by newlines for better context
-            paragraphs = text_buffer.split('\n\n')
-            current_chunk = ""
-            
-            for para in paragraphs:
-                if len(current_chunk) + len(para) < 1000:
-                    current_chunk += para + "\n\n"
+    print(f"Embedding provider: {embedding_provider.name} -> collection {collection.name}")
+    chunker = get_chunker()
+    print(f"Chunking: {chunker.signature}")
+    manifest = IngestManifest(embeddings.manifest_path(embedding_provider))
+
+    def checkpoint(ids, metadatas):
+        by_source = {}
+        for doc_id, meta in zip(ids, metadatas):
+            by_source.setdefault(meta["source"], []).append(doc_id)
+        for source, source_ids in by_source.items():
+            manifest.record_chunks(source, source_ids)
+        manifest.save()
+
+    statutes = StatuteIndex.load(settings.STATUTE_INDEX_PATH)
+
+    # Files that disappeared from the data directory take their chunks with them
+    for filename in [f for f in manifest.files if f not in files]:
+        print(f"Removing chunks of deleted file {filename}...")
+        delete_chunks(manifest.stored_ids(filename))
+        manifest.remove_file(filename)
+        statutes.remove_act(act_code(filename))
+
+    with EmbeddingPipeline(on_write=checkpoint) as pipeline:
+        for filename in files:
+            filepath = os.path.join(settings.DATA_DIR, filename)
+            file_hash = file_sha256(filepath)
+            if manifest.is_current(filename, file_hash, chunker.signature):
+                if not manifest.entry(filename).get("act_tagged"):
+                    # Stored before chunks carried their act: add it without re-embedding
+                    print(f"Tagging chunks of {filename} with act {act_code(filename)}...")
+                    tag_act(filename, manifest.stored_ids(filename))
+                    manifest.mark_act_tagged(filename)
+                if act_code(filename) not in statutes.acts:
+                    # Embeddings are current but the section index predates this file
+                    print(f"Indexing sections of {filename}...")
+                    parser = StatuteParser()
+                    for _ in parser.observe(iter_file_pages(filepath)):
+                        pass
+                    statutes.set_act(act_code(filename), parser.finish())
                 else:
-                    # Flush chunk
-                    if current_chunk.strip():
-                        # Use hash of chunk as pseudo-page number for TXT
-                        embed_and_store(filename, "1", current_chunk)
-                    current_chunk = para + "\n\n"
+                    print(f"Skipping {filename} (unchanged)")
+                continue
+
+            print(f"Processing {filename}...")
+            if manifest.entry(filename) is None:
+                # Not tracked yet: drop anything an older run stored under salted hash() IDs
+                collection.delete(where={"source": filename})
+            manifest.begin_file(filename, file_hash, chunker.signature)
+            stored_ids = manifest.stored_ids(filename)
+            live_ids = set()
+            failed_before = pipeline.failed
             
-            if current_chunk.strip():
-                    embed_and_store(filename, "1", current_chunk)
-                     
-        except Exception as e:
-            print(f"Failed to process {filename}: {e}")
-                     
+            try:
+                # Chunks stream straight from the page extractor into the embedding pipeline,
+                # so only a window of pages is ever held in memory. The statute parser
+                # reads the same stream to build the section index.
+                parser = StatuteParser()
+                pages = parser.observe(iter_file_pages(filepath))
+                for page_num, chunk_text, chunk_meta in chunker.chunks(pages):
+                    live_ids.add(embed_and_store(pipeline, filename, str(page_num), chunk_text, stored_ids, chunk_meta))
+                statutes.set_act(act_code(filename), parser.finish())
+
+                # Make sure every chunk of this file is written before the file is marked done
+                pipeline.flush()
+                live_ids.discard(None)
+                stale_ids = stored_ids - live_ids
+                if stale_ids:
+                    print(f"  Removing {len(stale_ids)} stale chunks from {filename}")
+                    delete_chunks(stale_ids)
+                manifest.finish_file(filename, live_ids, complete=pipeline.failed == failed_before)
+                if not manifest.entry(filename).get("act_tagged"):
+                    tag_act(filename, live_ids & stored_ids)  # Reused chunks may predate the "act" field
+                    manifest.mark_act_tagged(filename)
+                         
+            except Exception as e:
+                print(f"Failed to process {filename}: {e}")
+
+        pipeline.flush()
+        print(f"Ingestion complete: {pipeline.stored} chunks stored, {pipeline.failed} failed.")
+
+    statutes.save(settings.STATUTE_INDEX_PATH)
+    print(f"Statute index: " + ", ".join(f"{act} ({len(provisions)})" for act, provisions in statutes.acts.items()))
+    build_lexical_index()
+    if settings.VECTOR_ENGINE == "mmap":
+        build_vector_index()
+
+
+def iter_file_pages(filepath):
+    """(page_number, text) for a PDF (extracted in a process pool) or a plain-text file."""
+    if filepath.lower().endswith('.pdf'):
+        yield from iter_pdf_pages(filepath, max_workers=settings.PDF_EXTRACT_WORKERS)
+    else: # .txt
+        with open(filepath, 'r', encoding='utf-8') as f:
+            yield 1, f.read()
+
+
+def build_lexical_index():
+    """Rebuild the BM25 index from exactly the chunks now in Chroma, so both retrievers agree."""
+    index = lexical_index.build_from_collection(collection)
+    index.save(settings.LEXICAL_INDEX_PATH)
+    print(f"Lexical index built over {len(index)} chunks -> {settings.LEXICAL_INDEX_PATH}")
+
+
+def build_vector_index():
+    """Rebuild the memory-mapped vector index (VECTOR_ENGINE=mmap) from the chunks now in Chroma."""
+    path = embeddings.vector_index_path(embedding_provider)
+    count = MmapVectorIndex.build_from_collection(collection, path)
+    print(f"Vector index built over {count} chunks -> {path}.meta.json.gz")
 
 
-def embed_and_store(filename, page_num, text):
+def tag_act(filename, ids, batch_size=500):
+    """Sets the "act" metadata field (used for per-act filtered search) on already stored chunks."""
+    act = act_code(filename)
+    ids = list(ids)
+    for start in range(0, len(ids), batch_size):
+        page = collection.get(ids=ids[start:start + batch_size], include=["metadatas"])
+        untagged = [(doc_id, meta) for doc_id, meta in zip(page["ids"], page["metadatas"]) if meta.get("act") != act]
+        if untagged:
+            collection.update(
+                ids=[doc_id for doc_id, _ in untagged],
+                metadatas=[dict(meta, act=act) for _, meta in untagged],
+            )
+
+
+def delete_chunks(ids, batch_size=500):
+    ids = list(ids)
+    for start in range(0, len(ids), batch_size):
+        collection.delete(ids=ids[start:start + batch_size])
+
+
+def embed_and_store(pipeline, filename, page_num, text, stored_ids=frozenset(), extra_metadata=None):
+    """Queue a chunk for embedding unless it is already stored. Returns its ID (None if skipped)."""
     # Sanitize text
     clean_text = text.strip()
     if len(clean_text) < 50: # Skip tiny chunks
-        return
+        return None
 
-    # Generate ID
-    doc_id = f"{filename}_pg{page_num}_{hash(clean_text)}"
-    
-    # Store in Chroma (Let's stick to default embeddings if Gemini fails, 
-    # OR strictly use Gemini. For a hackathon, let's use Gemini explicitly)
-    
-    # Note: Standard Chroma add() computes embeddings automatically if none provided.
-    # But we want 'Gemini Implementation'. 
-    # To keep it fast/robust, we will pass embeddings explicitly.
-    
-    embedding = get_gemini_embedding(clean_text)
-    if not embedding:
-        return
+    # Deterministic, content-derived ID so re-runs deduplicate instead of duplicating
+    doc_id = chunk_id(filename, page_num, clean_text)
+    if doc_id in stored_ids:
+        return doc_id
 
-    collection.add(
-        documents=[clean_text],
-        metadatas=[{"source": filename, "page": page_num}],
-        ids=[doc_id],
-        embeddings=[embedding]
-    )
-    print(f"  Stored chunk from {filename} page {page_num}")
+    # Embeddings are passed explicitly (from the configured provider) rather than letting Chroma compute them.
+    # The pipeline batches both the embedding calls and the Chroma writes.
+    metadata = {"source": filename, "page": page_num, "act": act_code(filename)}
+    metadata.update(extra_metadata or {})
+    pipeline.add(doc_id, clean_text, metadata)
+    return doc_id
 
 if __name__ == "__main__":
     ingest_data()
@@ -0,0 +1,110 @@
+import os
+import json
+import hashlib
+import tempfile
+
+# Chunker of manifest entries written before the chunker was recorded (the line splitter)
+LEGACY_CHUNKER = "chars:1000"
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Content hash of a file, read in blocks so large gazettes are not loaded at once."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(filename, page_num, text):
+    """
+    Deterministic chunk ID. Unlike Python's hash(), which is salted per process,
+    this is stable across runs, so re-ingesting the same text maps to the same ID.
+    """
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+    return f"{filename}_pg{page_num}_{digest}"
+
+
+class IngestManifest:
+    """
+    Persistent record of what has been ingested into the vector store.
+
+    Layout:
+        {"version": 1, "files": {filename: {"sha256": ..., "chunker": ..., "complete": bool,
+                                            "act_tagged": bool, "chunks": [ids]}}}
+
+    "chunker" is the chunking strategy's signature: a file is re-chunked when it changes.
+    "act_tagged" says every stored chunk carries the "act" metadata field.
+
+    "chunks" only ever lists IDs that are confirmed written, and the manifest is
+    checkpointed after every Chroma write, so an interrupted run resumes where it stopped.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == self.VERSION:
+                    self.files = data.get("files", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable ingest manifest {path}: {e}")
+
+    def entry(self, filename):
+        return self.files.get(filename)
+
+    def is_current(self, filename, sha256, chunker=LEGACY_CHUNKER):
+        entry = self.files.get(filename)
+        return bool(
+            entry and entry.get("complete") and entry.get("sha256") == sha256
+            and entry.get("chunker", LEGACY_CHUNKER) == chunker
+        )
+
+    def begin_file(self, filename, sha256, chunker=LEGACY_CHUNKER):
+        """Mark a file as in progress at a new content hash, keeping its confirmed chunks."""
+        entry = self.files.setdefault(filename, {"chunks": []})
+        entry["sha256"] = sha256
+        entry["chunker"] = chunker
+        entry["complete"] = False
+        self.save()
+
+    def stored_ids(self, filename):
+        entry = self.files.get(filename)
+        return set(entry["chunks"]) if entry else set()
+
+    def record_chunks(self, filename, ids):
+        entry = self.files.setdefault(filename, {"sha256": None, "complete": False, "chunks": []})
+        entry["chunks"] = sorted(set(entry["chunks"]).union(ids))
+
+    def finish_file(self, filename, live_ids, complete=True):
+        """Replace the file's chunk list with the IDs that are live after this run."""
+        entry = self.files[filename]
+        entry["chunks"] = sorted(set(entry["chunks"]).intersection(live_ids))
+        entry["complete"] = complete
+        self.save()
+
+    def mark_act_tagged(self, filename):
+        self.files[filename]["act_tagged"] = True
+        self.save()
+
+    def remove_file(self, filename):
+        self.files.pop(filename, None)
+        self.save()
+
+    def save(self):
+        """Atomic write: a crash mid-save never leaves a truncated manifest behind."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".manifest-", suffix=".json")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.VERSION, "files": self.files}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
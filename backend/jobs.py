@@ -0,0 +1,304 @@
+import json
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from .config import settings
+from . import models, database, doc_processor, form_builder, rag_engine
+
+logger = logging.getLogger(__name__)
+
+# Background jobs for the tools whose model calls take long enough to tie up a request
+# (and trip proxy timeouts). Submitting stores the job, upload included, in the database
+# and hands it to that tool's thread pool; clients poll GET /jobs/<id> or stream its
+# progress. Every state change is a conditional UPDATE: a worker claims a queued job
+# with a fresh claim token, and its later writes only apply while the job still carries
+# that token, so a job is never run twice at once, even across uvicorn workers.
+#
+# Jobs survive restarts and crashed workers. While a job runs, this process refreshes its
+# updated_at every JOB_HEARTBEAT_SECONDS; a monitor thread started by `start()` runs
+# `resume()` at startup and on the same interval, requeueing running jobs that no live
+# worker has touched for JOB_STALE_SECONDS and dispatching every queued job.
+
+
+class JobFailed(Exception):
+    """The tool reported an error; its message is shown to the user."""
+
+
+def _simplify_doc(params, payload, progress):
+    summary = doc_processor.simplify_document(
+        payload, params["mime_type"], language=params.get("language", "en"), progress=progress
+    )
+    if summary.startswith("Error:"):
+        raise JobFailed(summary)
+    return {"response": summary}
+
+
+def _generate_draft(params, payload, progress):
+    draft = form_builder.generate_draft(params["case_type"], params["details"], params.get("language", "en"))
+    if draft.startswith("Error"):
+        raise JobFailed(draft)
+    return {"draft": draft}
+
+
+def _transcribe(params, payload, progress):
+    transcript = rag_engine.transcribe_audio(payload, mime_type=params.get("mime_type") or "audio/webm")
+    if transcript.startswith("Error:"):
+        raise JobFailed(transcript)
+    return {"transcript": transcript}
+
+
+TOOLS = {
+    "simplify_doc": _simplify_doc,
+    "generate_draft": _generate_draft,
+    "transcribe": _transcribe,
+}
+
+FINISHED = (models.JobStatus.DONE.value, models.JobStatus.FAILED.value)
+
+_lock = threading.Lock()
+_pools = {}  # tool -> ThreadPoolExecutor, created on first use
+_running = {}  # job id -> claim token, for the jobs this process is running
+_dispatched = set()  # job ids handed to a pool here but not yet picked up by a worker
+_counts = {"submitted": 0, "done": 0, "failed": 0, "resumed": 0}
+_closed = False
+
+
+def _pool(tool):
+    with _lock:
+        if _closed:
+            return None
+        pool = _pools.get(tool)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=settings.JOB_WORKERS.get(tool, 1), thread_name_prefix=f"job-{tool}")
+            _pools[tool] = pool
+        return pool
+
+
+def _dispatch(job_id, tool):
+    """Hands a queued job to its tool's pool, unless this process already has."""
+    pool = _pool(tool)
+    if pool is None:
+        return False  # Shutting down: the job stays queued and is resumed at the next start
+    with _lock:
+        if job_id in _dispatched or job_id in _running:
+            return False
+        _dispatched.add(job_id)
+    try:
+        pool.submit(_run, job_id)
+        return True
+    except RuntimeError:
+        with _lock:
+            _dispatched.discard(job_id)
+        return False
+
+
+def _count(key):
+    with _lock:
+        _counts[key] += 1
+
+
+def _update(db, job_id, token, values):
+    """Writes to a job this worker still holds; False if it was requeued or claimed elsewhere."""
+    updated = db.query(models.Job).filter(
+        models.Job.id == job_id,
+        models.Job.claim_token == token,
+        models.Job.status == models.JobStatus.RUNNING.value,
+    ).update({**values, "updated_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    return bool(updated)
+
+
+def _write(job_id, token, **values):
+    # A fresh session per write: progress is reported from inside the tool call
+    db = database.SessionLocal()
+    try:
+        return _update(db, job_id, token, values)
+    except Exception as e:
+        logger.warning(f"Could not update job {job_id}: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def _claim(db, job_id):
+    token = uuid.uuid4().hex
+    claimed = db.query(models.Job).filter(
+        models.Job.id == job_id, models.Job.status == models.JobStatus.QUEUED.value
+    ).update({
+        "status": models.JobStatus.RUNNING.value,
+        "claim_token": token,
+        "attempts": models.Job.attempts + 1,
+        "updated_at": datetime.utcnow(),
+    }, synchronize_session=False)
+    db.commit()
+    return token if claimed else None
+
+
+def _run(job_id):
+    db = database.SessionLocal()
+    token = None
+    try:
+        token = _claim(db, job_id)
+        if token is None:
+            return  # Already taken by another worker
+        with _lock:
+            _running[job_id] = token
+            _dispatched.discard(job_id)
+        job = db.query(models.Job).filter(models.Job.id == job_id).first()
+        tool, params, payload = job.tool, json.loads(job.params or "{}"), job.payload
+        db.close()  # Not held open across the model call
+
+        def progress(event):
+            _write(job_id, token, progress=json.dumps(event, ensure_ascii=False))
+
+        try:
+            result = TOOLS[tool](params, payload, progress)
+            values = {"status": models.JobStatus.DONE.value, "result": json.dumps(result, ensure_ascii=False)}
+        except JobFailed as e:
+            values = {"status": models.JobStatus.FAILED.value, "error": str(e)}
+        except Exception as e:
+            logger.error(f"Job {job_id} ({tool}) failed: {e}", exc_info=True)
+            values = {"status": models.JobStatus.FAILED.value, "error": "The job failed unexpectedly. Please try again."}
+        if _write(job_id, token, payload=None, finished_at=datetime.utcnow(), **values):
+            _count(values["status"])
+    except Exception as e:
+        logger.error(f"Job {job_id} could not be run: {e}", exc_info=True)
+    finally:
+        with _lock:
+            _dispatched.discard(job_id)
+            if token and _running.get(job_id) == token:
+                del _running[job_id]
+        db.close()
+
+
+def submit(db, user_id, tool, params, payload=None):
+    """Stores a new job and queues it on the tool's pool. Returns the Job."""
+    if tool not in TOOLS:
+        raise ValueError(f"Unknown job tool {tool!r}")
+    job = models.Job(
+        id=uuid.uuid4().hex, user_id=user_id, tool=tool, status=models.JobStatus.QUEUED.value,
+        params=json.dumps(params, ensure_ascii=False), payload=payload, attempts=0,
+    )
+    db.add(job)
+    db.commit()
+    _count("submitted")
+    _dispatch(job.id, tool)
+    return job
+
+
+def get(db, job_id, user_id):
+    """The user's job, or None (also for someone else's job)."""
+    return db.query(models.Job).filter(models.Job.id == job_id, models.Job.user_id == user_id).first()
+
+
+def to_dict(job):
+    return {
+        "job_id": job.id,
+        "tool": job.tool,
+        "status": job.status,
+        "progress": json.loads(job.progress) if job.progress else None,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def _heartbeat():
+    """Refreshes updated_at on the jobs this process is running, so they are not taken for orphans."""
+    with _lock:
+        running = dict(_running)
+    if not running:
+        return
+    db = database.SessionLocal()
+    try:
+        for job_id, token in running.items():
+            _update(db, job_id, token, {})
+    finally:
+        db.close()
+
+
+def resume():
+    """
+    Recovery, at startup and then every JOB_HEARTBEAT_SECONDS: deletes expired finished
+    jobs, requeues running jobs that are not running here and whose worker went silent
+    (or fails them after JOB_MAX_ATTEMPTS), then dispatches every queued job.
+    """
+    with _lock:
+        own_tokens = list(_running.values())
+    db = database.SessionLocal()
+    try:
+        now = datetime.utcnow()
+        db.query(models.Job).filter(
+            models.Job.status.in_(FINISHED),
+            models.Job.finished_at < now - timedelta(hours=settings.JOB_RETENTION_HOURS),
+        ).delete(synchronize_session=False)
+
+        orphaned = [
+            models.Job.status == models.JobStatus.RUNNING.value,
+            models.Job.updated_at < now - timedelta(seconds=settings.JOB_STALE_SECONDS),
+        ]
+        if own_tokens:
+            orphaned.append(models.Job.claim_token.notin_(own_tokens))
+        db.query(models.Job).filter(*orphaned, models.Job.attempts >= settings.JOB_MAX_ATTEMPTS).update({
+            "status": models.JobStatus.FAILED.value, "error": "The job was interrupted too many times.",
+            "payload": None, "claim_token": None, "finished_at": now, "updated_at": now,
+        }, synchronize_session=False)
+        db.query(models.Job).filter(*orphaned).update({
+            "status": models.JobStatus.QUEUED.value, "claim_token": None, "updated_at": now,
+        }, synchronize_session=False)
+        db.commit()
+
+        queued = db.query(models.Job.id, models.Job.tool).filter(
+            models.Job.status == models.JobStatus.QUEUED.value
+        ).order_by(models.Job.created_at).all()
+    finally:
+        db.close()
+    resumed = sum(_dispatch(job_id, tool) for job_id, tool in queued)
+    with _lock:
+        _counts["resumed"] += resumed
+    if resumed:
+        logger.info(f"Resumed {resumed} queued job(s)")
+
+
+def _monitor():
+    while True:
+        time.sleep(settings.JOB_HEARTBEAT_SECONDS)
+        try:
+            _heartbeat()  # Also after shutdown(), while the running jobs finish
+            if not _closed:
+                resume()
+        except Exception as e:
+            logger.warning(f"Job monitor pass failed: {e}")
+
+
+def start():
+    """Resumes jobs left over from before a restart, then starts the heartbeat/recovery thread."""
+    resume()
+    thread = threading.Thread(target=_monitor, name="job-monitor", daemon=True)
+    thread.start()
+    return thread
+
+
+def shutdown():
+    """
+    Stops taking jobs: queued ones stay queued in the database for the next start. Jobs
+    already running finish first (the interpreter joins pool threads at exit); if the
+    process is killed instead, another worker's `resume()` requeues them once they are stale.
+    """
+    global _closed
+    with _lock:
+        _closed = True
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def stats():
+    """Jobs submitted, finished and resumed by this process, and how many are running now."""
+    with _lock:
+        return {**_counts, "running": len(_running)}
@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import gzip
+import math
+import tempfile
+import threading
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = {
+    "a", "an", "the", "of", "to", "in", "on", "and", "or", "is", "are", "be", "by", "for",
+    "with", "as", "at", "it", "this", "that", "what", "which", "who", "any", "such", "shall",
+}
+
+# Statute references, e.g. "Section 303", "sec. 64(2)", "धारा 420", "Article 21A", "BNS 303"
+SECTION_REF = re.compile(r"\b(?:section|sec\.?|s\.)\s*(\d{1,3}[A-Z]?)\b|धारा\s*(\d{1,3}[A-Z]?)", re.IGNORECASE)
+ARTICLE_REF = re.compile(r"\b(?:article|art\.?)\s*(\d{1,3}[A-Z]?)\b|अनुच्छेद\s*(\d{1,3}[A-Z]?)", re.IGNORECASE)
+ACT_REF = re.compile(r"\b(BNSS|BNS|BSA)\b(?:\s*(?:section|sec\.?|s\.)?\s*(\d{1,3}[A-Z]?)\b)?", re.IGNORECASE)
+CONSTITUTION = "CONSTITUTION"
+
+
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall(text.casefold()) if t not in STOPWORDS]
+
+
+def parse_references(query):
+    """
+    Extracts statute references from a query as (act, number) pairs.
+    `act` is "BNS", "BNSS", "BSA", "CONSTITUTION" or None when the query names
+    a section without saying which act.
+    """
+    refs = []
+    acts = [m.group(1).upper() for m in ACT_REF.finditer(query)]
+    for match in ARTICLE_REF.finditer(query):
+        refs.append((CONSTITUTION, (match.group(1) or match.group(2)).upper()))
+    for match in SECTION_REF.finditer(query):
+        number = (match.group(1) or match.group(2)).upper()
+        refs.append((acts[0] if len(acts) == 1 else None, number))
+    for match in ACT_REF.finditer(query):
+        if match.group(2):  # "BNS 303" style, act and number together
+            refs.append((match.group(1).upper(), match.group(2).upper()))
+    return list(dict.fromkeys(refs))
+
+
+def act_code(filename):
+    """'BNS_2023.pdf' -> 'BNS', 'Constitution.pdf' -> 'CONSTITUTION'."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return stem.split("_")[0].upper()
+
+
+def act_of(metadata):
+    """Act code of a chunk: its "act" field, or derived from the source file for older chunks."""
+    return metadata.get("act") or act_code(metadata.get("source", ""))
+
+
+def source_matches_act(source, act):
+    source = source.upper()
+    if act is None:
+        return not source.startswith(CONSTITUTION)
+    return source.startswith(act + "_") or source.startswith(act + ".") or source == act
+
+
+class BM25Index:
+    """In-process Okapi BM25 inverted index over the same chunks stored in Chroma."""
+
+    def __init__(self, ids, documents, metadatas, k1=1.5, b=0.75):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> [(doc index, term frequency)]
+        self.doc_lengths = []
+        for idx, text in enumerate(self.documents):
+            counts = Counter(tokenize(text))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((idx, tf))
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        self._id_index = {doc_id: idx for idx, doc_id in enumerate(self.ids)}
+        self._act_members = {}  # act -> set of doc indexes
+        for idx, meta in enumerate(self.metadatas):
+            self._act_members.setdefault(act_of(meta), set()).add(idx)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.ids) - df + 0.5) / (df + 0.5))
+
+    def scores(self, query, candidates=None):
+        """BM25 score per document index, optionally restricted to `candidates`."""
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for idx, tf in postings:
+                if candidates is not None and idx not in candidates:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[idx] / (self.avg_length or 1))
+                scores[idx] = scores.get(idx, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query, n_results=10, acts=None):
+        """Top BM25 hits, optionally only among chunks of the given act codes."""
+        candidates = None
+        if acts:
+            candidates = set().union(*(self._act_members.get(act, set()) for act in acts))
+        ranked = sorted(self.scores(query, candidates).items(), key=lambda item: item[1], reverse=True)
+        return [self.hit(idx, score) for idx, score in ranked[:n_results]]
+
+    def hit(self, idx, score=None):
+        return {"id": self.ids[idx], "document": self.documents[idx], "metadata": self.metadatas[idx], "score": score}
+
+    def get(self, doc_id):
+        idx = self._id_index.get(doc_id)
+        return self.hit(idx) if idx is not None else None
+
+    def lookup_references(self, query, refs, n_results=3):
+        """
+        Chunks that contain the referenced sections/articles. Chunks holding the
+        provision's heading ("303." / "21.") come first, then chunks that start inside it;
+        ties are broken by BM25 score against the query.
+        """
+        headed, inside = set(), set()
+        for act, number in refs:
+            # Headings are not always at a line start (the Constitution extracts as one line per page)
+            heading = re.compile(rf"(?<![\w(]){re.escape(number)}\.\s*(?=[A-Z(\u2014\-])")
+            for idx, meta in enumerate(self.metadatas):
+                if not source_matches_act(meta.get("source", ""), act):
+                    continue
+                if heading.search(self.documents[idx]):
+                    headed.add(idx)
+                elif meta.get("section") == number:
+                    inside.add(idx)
+        candidates = headed | inside
+        if not candidates:
+            return []
+        scores = self.scores(query, candidates)
+        ranked = sorted(candidates, key=lambda idx: (idx not in headed, -scores.get(idx, 0.0), idx))
+        return [self.hit(idx, scores.get(idx, 0.0)) for idx in ranked[:n_results]]
+
+    # --- Persistence ---
+
+    def save(self, path):
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".lexical-", suffix=".json.gz")
+        os.close(fd)
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump({"ids": self.ids, "documents": self.documents, "metadatas": self.metadatas}, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["ids"], data["documents"], data["metadatas"])
+
+
+def build_from_collection(collection, page_size=1000):
+    """Builds the lexical index from every chunk currently stored in a Chroma collection."""
+    ids, documents, metadatas = [], [], []
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        offset += len(page["ids"])
+    return BM25Index(ids, documents, metadatas)
+
+
+_loaded = {"index": None, "mtime": None}
+_load_lock = threading.Lock()
+
+
+def get_index(path):
+    """
+    Returns the persisted index, reloading it when a re-ingest has rewritten the file.
+    Returns None when no index has been built yet (retrieval then stays dense-only).
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _loaded["mtime"] != mtime:
+        with _load_lock:
+            if _loaded["mtime"] != mtime:
+                _loaded["index"] = BM25Index.load(path)
+                _loaded["mtime"] = mtime
+    return _loaded["index"]
@@ -0,0 +1,51 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from .config import settings
+
+# The Gemini SDK calls (generate_content, embed_content) and their time.sleep backoff are
+# blocking. Endpoints hand them to this bounded pool so the event loop keeps serving other
+# users while a model call is in flight; calls beyond the limit queue here instead of
+# piling threads onto the default executor.
+_executor = ThreadPoolExecutor(max_workers=settings.LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking model call on the LLM pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+def submit(func, *args, **kwargs):
+    """Fire-and-forget background work (e.g. conversation summaries) on the LLM pool."""
+    return _executor.submit(func, *args, **kwargs)
+
+
+def _close_quietly(close):
+    try:
+        close()
+    except ValueError:  # Still running a next() the caller stopped waiting for
+        pass
+
+
+async def iterate_blocking(iterator):
+    """
+    Async iteration over a blocking iterator (e.g. a streamed Gemini response): each
+    `next()` runs on the LLM pool, so the event loop is free between chunks.
+    """
+    loop = asyncio.get_running_loop()
+    done = object()
+    try:
+        while True:
+            item = await loop.run_in_executor(_executor, next, iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await loop.run_in_executor(_executor, _close_quietly, close)
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
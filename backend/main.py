@@ -1,21 +1,34 @@
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 import uvicorn
 import logging
-from . import models, database, auth
+from . import database, auth, llm_executor, warmup, jobs
+from .routers import admin as admin_router
 from .routers import auth as auth_router
 from .routers import chat as chat_router
+from .routers import health as health_router
+from .routers import jobs as jobs_router
 from .routers import judicial as judicial_router
 from .routers import pages as pages_router
 from .routers import tools as tools_router
 
 logger = logging.getLogger(__name__)
 
-# Create Database Tables
-models.Base.metadata.create_all(bind=database.engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tables are created at startup rather than at import; the Gemini SDK, the vector
+    # store and the indexes are loaded by the warm-up thread while /healthz already
+    # answers, and /readyz turns 200 once they are in memory.
+    database.init_db()
+    jobs.start()  # Background jobs queued or orphaned before a restart, then their heartbeat
+    warmup.start()
+    yield
+    jobs.shutdown()
+    llm_executor.shutdown()
 
-app = FastAPI(title="NyayaSetu")
+app = FastAPI(title="NyayaSetu", lifespan=lifespan)
 
 # --- CORS Middleware (#6) ---
 app.add_middleware(
@@ -67,11 +80,14 @@ async def sliding_session_middleware(request: Request, call_next):
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Include Routers
+app.include_router(health_router.router)
 app.include_router(auth_router.router)
 app.include_router(chat_router.router)
 app.include_router(judicial_router.router)
 app.include_router(judicial_router.router_aux)
 app.include_router(tools_router.router)
+app.include_router(jobs_router.router)
+app.include_router(admin_router.router)
 app.include_router(pages_router.router)
 
 if __name__ == "__main__":
@@ -0,0 +1,355 @@
+import math
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class AllModelsUnavailable(Exception):
+    """Every candidate model failed or has its circuit open."""
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty sequence, p in [0, 100]."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(p / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class ModelHealth:
+    """
+    Rolling outcome window and circuit breaker for one model.
+
+    The breaker opens after `failure_threshold` consecutive failures, or when the error
+    rate over the window reaches `error_rate_threshold`. After `cooldown` seconds one
+    request is let through as a probe (half-open): success closes the breaker, failure
+    reopens it with the cooldown doubled, up to `max_cooldown`.
+    """
+
+    def __init__(self, name, window=50, failure_threshold=3, error_rate_threshold=0.5,
+                 min_samples=10, cooldown=30.0, max_cooldown=600.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.outcomes = deque(maxlen=window)  # True/False per call
+        self.latencies = {}  # task -> deque of successful call durations (seconds)
+        self.window = window
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.last_error = None
+        self.calls = 0
+        self.failures = 0
+        self.times_opened = 0
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def latency(self, task, p=50):
+        samples = self.latencies.get(task)
+        return percentile(samples, p) if samples else None
+
+    def acquire(self, now):
+        """Whether a call may go to this model now; claims the probe slot when half-open."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self, task, duration):
+        self.calls += 1
+        self.outcomes.append(True)
+        self.latencies.setdefault(task, deque(maxlen=self.window)).append(duration)
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            logger.info(f"Model {self.name} recovered, closing circuit")
+            # The failures that opened the breaker would otherwise reopen it on the next error
+            self.outcomes.clear()
+            self.outcomes.append(True)
+        self.state = CLOSED
+        self.cooldown = self.base_cooldown
+        self.probe_in_flight = False
+
+    def record_failure(self, error, now):
+        self.calls += 1
+        self.failures += 1
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        self.last_error = str(error)[:200]
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self._open(now)
+        elif self.state == CLOSED and (
+            self.consecutive_failures >= self.failure_threshold
+            or (len(self.outcomes) >= self.min_samples and self.error_rate() >= self.error_rate_threshold)
+        ):
+            self._open(now)
+        self.probe_in_flight = False
+
+    def release(self):
+        """Gives back a probe slot that was claimed but not used."""
+        self.probe_in_flight = False
+
+    def _open(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        logger.warning(f"Circuit open for model {self.name} for {self.cooldown:.0f}s: {self.last_error}")
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate(), 4),
+            "times_opened": self.times_opened,
+            "last_error": self.last_error,
+            "latency": {
+                task: {"p50": round(percentile(samples, 50), 3), "p95": round(percentile(samples, 95), 3)}
+                for task, samples in self.latencies.items() if samples
+            },
+        }
+
+
+class ModelRouter:
+    """
+    Shared router for generation calls. Each task type ("chat", "judicial", "transcribe",
+    "simplify") has a list of eligible models in preference order; every call goes to the
+    fastest healthy model for that task (median latency of recent successful calls), and
+    falls through to the next one on error. Models without latency samples keep their
+    configured position ahead of measured ones, so each gets measured once.
+    A small `explore` fraction of calls tries the candidates in configured order,
+    so the latency of slower models does not go stale.
+    """
+
+    def __init__(self, tasks, explore=0.05, hedge_percentile=95, hedge_default_delay=5.0,
+                 hedge_min_delay=0.5, hedge_workers=32, **health_options):
+        self.tasks = tasks
+        self.explore = explore
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_min_delay = hedge_min_delay
+        self._hedge_workers = hedge_workers
+        self._hedge_pool = None
+        self._health_options = health_options
+        self._health = {}
+        self._hedging = {}  # task -> counters, see hedging_stats()
+        self._lock = threading.Lock()
+
+    def health(self, model):
+        with self._lock:
+            if model not in self._health:
+                self._health[model] = ModelHealth(model, **self._health_options)
+            return self._health[model]
+
+    def ranked(self, task):
+        """Eligible models for a task, fastest healthy first (circuit state not checked)."""
+        models = self.tasks.get(task) or self.tasks["default"]
+        if random.random() < self.explore:
+            return list(models)
+        unmeasured = [m for m in models if self.health(m).latency(task) is None]
+        measured = sorted(
+            (m for m in models if m not in unmeasured),
+            key=lambda m: self.health(m).latency(task),
+        )
+        return unmeasured + measured
+
+    def acquire(self, task):
+        """Yields models the caller may try now, in routing order; each claim must be reported."""
+        for model in self.ranked(task):
+            health = self.health(model)
+            with self._lock:
+                allowed = health.acquire(time.monotonic())
+            if allowed:
+                yield model
+
+    def record_success(self, model, task, duration):
+        health = self.health(model)
+        with self._lock:
+            health.record_success(task, duration)
+
+    def record_failure(self, model, error):
+        health = self.health(model)
+        with self._lock:
+            health.record_failure(error, time.monotonic())
+
+    def release(self, model):
+        health = self.health(model)
+        with self._lock:
+            health.release()
+
+    def call(self, task, fn, hedge=False):
+        """
+        Runs `fn(model_name)` against the routed models until one succeeds and returns
+        its result. Raises AllModelsUnavailable when every model failed or is open.
+        With `hedge`, a slow model is raced against the next one (see call_hedged).
+        """
+        if hedge:
+            return self.call_hedged(task, fn)
+        errors = []
+        for model in self.acquire(task):
+            started = time.monotonic()
+            try:
+                result = fn(model)
+            except Exception as e:
+                self.record_failure(model, e)
+                logger.warning(f"{task}: model {model} failed: {e}")
+                errors.append(f"{model}: {e}")
+                continue
+            self.record_success(model, task, time.monotonic() - started)
+            return result
+        raise AllModelsUnavailable("; ".join(errors) or f"No healthy model for {task}")
+
+    def stream(self, task, start):
+        """
+        Streaming counterpart of `call`: `start(model_name)` returns an iterator of chunks.
+        Falls through to the next model only while nothing has been yielded yet; an error
+        after the first chunk is recorded against the model and re-raised.
+        """
+        errors = []
+        for model in self.acquire(task):
+            started = time.monotonic()
+            try:
+                chunks = iter(start(model))
+                first = next(chunks, None)
+            except Exception as e:
+                self.record_failure(model, e)
+                logger.warning(f"{task}: model {model} failed: {e}")
+                errors.append(f"{model}: {e}")
+                continue
+            try:
+                if first is not None:
+                    yield first
+                for chunk in chunks:
+                    yield chunk
+            except GeneratorExit:
+                self.release(model)  # Consumer went away; says nothing about the model
+                raise
+            except Exception as e:
+                self.record_failure(model, e)
+                raise
+            self.record_success(model, task, time.monotonic() - started)
+            return
+        raise AllModelsUnavailable("; ".join(errors) or f"No healthy model for {task}")
+
+    # --- Hedged requests ---
+
+    def hedge_delay(self, model, task):
+        """How long to wait for `model` before hedging: its latency at `hedge_percentile` for this task."""
+        latency = self.health(model).latency(task, self.hedge_percentile)
+        if latency is None:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, latency)
+
+    def _count(self, task, counter):
+        with self._lock:
+            counters = self._hedging.setdefault(task, {"calls": 0, "hedged": 0, "hedge_wins": 0})
+            counters[counter] += 1
+
+    def call_hedged(self, task, fn):
+        """
+        Like `call`, but when the model has not answered within its hedge delay a second
+        request goes to the next routed model. The first successful response wins; the
+        other request is cancelled if it has not started yet, and otherwise left to finish
+        in the background with its result discarded (the synchronous Gemini client cannot
+        abort a request in flight). Its outcome still feeds the model's health stats.
+        """
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=self._hedge_workers, thread_name_prefix="llm-hedge")
+        candidates = self.acquire(task)
+        pending = {}  # future -> (model, started)
+        errors = []
+
+        def launch():
+            for model in candidates:
+                pending[self._hedge_pool.submit(fn, model)] = (model, time.monotonic())
+                return model
+            return None
+
+        primary = launch()
+        if primary is None:
+            raise AllModelsUnavailable(f"No healthy model for {task}")
+        self._count(task, "calls")
+        hedged = False
+        while pending:
+            done, _ = wait(pending, timeout=None if hedged else self.hedge_delay(primary, task), return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                if launch() is not None:
+                    self._count(task, "hedged")
+                continue
+            for future in done:
+                model, started = pending.pop(future)
+                error = future.exception()
+                if error is not None:
+                    self.record_failure(model, error)
+                    logger.warning(f"{task}: model {model} failed: {error}")
+                    errors.append(f"{model}: {error}")
+                    continue
+                self.record_success(model, task, time.monotonic() - started)
+                if model != primary:
+                    self._count(task, "hedge_wins")
+                for loser, (loser_model, loser_started) in pending.items():
+                    if not loser.cancel():
+                        loser.add_done_callback(self._settle(loser_model, task, loser_started))
+                    else:
+                        self.release(loser_model)
+                return future.result()
+            if not pending:
+                # Hard failure: fall back to the next model, which gets its own hedge delay
+                primary = launch()
+                hedged = False
+        raise AllModelsUnavailable("; ".join(errors) or f"No healthy model for {task}")
+
+    def _settle(self, model, task, started):
+        """Records the outcome of a request that lost the race."""
+        def settle(future):
+            error = future.exception()
+            if error is not None:
+                self.record_failure(model, error)
+            else:
+                self.record_success(model, task, time.monotonic() - started)
+        return settle
+
+    def hedging_stats(self):
+        with self._lock:
+            return {
+                task: dict(counters,
+                           hedge_rate=round(counters["hedged"] / counters["calls"], 4) if counters["calls"] else 0.0,
+                           hedge_win_rate=round(counters["hedge_wins"] / counters["hedged"], 4) if counters["hedged"] else 0.0)
+                for task, counters in self._hedging.items()
+            }
+
+    def stats(self):
+        with self._lock:
+            models = {name: health.stats() for name, health in self._health.items()}
+        return {"models": models, "hedging": self.hedging_stats()}
+
+
+router = ModelRouter(
+    settings.LLM_TASK_MODELS,
+    failure_threshold=settings.MODEL_FAILURE_THRESHOLD,
+    cooldown=settings.MODEL_CIRCUIT_COOLDOWN,
+    hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+    hedge_default_delay=settings.LLM_HEDGE_DEFAULT_DELAY,
+    hedge_workers=settings.LLM_MAX_CONCURRENCY,
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, Enum
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, Enum, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -32,6 +32,8 @@ class ChatSession(Base):
     title = Column(String, default="New Conversation")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
+    summary = Column(Text, nullable=True)  # Rolling summary of the older messages
+    summarized_through = Column(Integer, nullable=True)  # Id of the last message folded into the summary
 
     owner = relationship("User", back_populates="chats")
     messages = relationship("Message", back_populates="session", cascade="all, delete-orphan")
@@ -207,6 +209,8 @@ class JudicialChatSession(Base):
     title = Column(String, default="New Judicial Chat")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
+    summary = Column(Text, nullable=True)  # Rolling summary of the older messages
+    summarized_through = Column(Integer, nullable=True)  # Id of the last message folded into the summary
 
     owner = relationship("User", back_populates="judicial_chats")
     messages = relationship("JudicialMessage", back_populates="session", cascade="all, delete-orphan")
@@ -221,3 +225,28 @@ class JudicialMessage(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     session = relationship("JudicialChatSession", back_populates="messages")
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class Job(Base):
+    """A long-running AI tool call (see backend/jobs.py), persisted so it survives a restart."""
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True)  # Random hex id, safe to show to the client
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    tool = Column(String, nullable=False)  # simplify_doc, generate_draft, transcribe
+    status = Column(String, default=JobStatus.QUEUED.value, index=True)
+    params = Column(Text)  # JSON arguments
+    payload = Column(LargeBinary, nullable=True)  # Uploaded file, dropped once the job finishes
+    progress = Column(Text, nullable=True)  # JSON, latest progress event
+    result = Column(Text, nullable=True)  # JSON
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    claim_token = Column(String, nullable=True)  # Set by the worker running it; guards its writes
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # Also the running worker's heartbeat
+    finished_at = Column(DateTime, nullable=True)
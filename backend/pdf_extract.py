@@ -0,0 +1,71 @@
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pypdf import PdfReader, PdfWriter
+
+# Each worker process opens the PDF once and keeps the reader for all its pages
+_worker_reader = None
+
+
+def _init_worker(path):
+    global _worker_reader
+    _worker_reader = PdfReader(path)
+
+
+def _extract_page(index):
+    try:
+        return _worker_reader.pages[index].extract_text() or ""
+    except Exception as e:
+        print(f"  Could not extract page {index + 1}: {e}")
+        return ""
+
+
+def count_pages(path):
+    return len(PdfReader(path).pages)
+
+
+def iter_pdf_pages(path, max_workers=None, read_ahead=None):
+    """
+    Yields (page_number, text) in page order, 1-based.
+
+    Extraction runs in a process pool (pypdf is pure Python, so threads would not help).
+    At most `read_ahead` pages are in flight at once, so memory stays flat no matter
+    how large the gazette is.
+    """
+    max_workers = max_workers or min(4, os.cpu_count() or 1)
+    read_ahead = read_ahead or max_workers * 4
+    num_pages = count_pages(path)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(path,)) as pool:
+        in_flight = deque()
+        next_index = 0
+        while next_index < num_pages or in_flight:
+            while next_index < num_pages and len(in_flight) < read_ahead:
+                in_flight.append((next_index + 1, pool.submit(_extract_page, next_index)))
+                next_index += 1
+            page_number, future = in_flight.popleft()
+            yield page_number, future.result()
+
+
+def read_pdf_bytes(data):
+    """A reader over an in-memory PDF (e.g. an upload)."""
+    return PdfReader(io.BytesIO(data))
+
+
+def page_text(reader, index):
+    """Text of one page, or "" if pypdf cannot extract it."""
+    try:
+        return reader.pages[index].extract_text() or ""
+    except Exception:
+        return ""
+
+
+def pages_as_pdf(reader, indexes):
+    """A new PDF holding only the given pages (0-based), as bytes."""
+    writer = PdfWriter()
+    for index in indexes:
+        writer.add_page(reader.pages[index])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
@@ -0,0 +1,95 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate without a tokenizer round-trip: about 4 characters per token
+    for Latin script and about 2 for Indic scripts, which tokenize more densely.
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) // 2 + 1
+
+
+class PromptAssembler:
+    """
+    Packs prompt sections into a token budget by priority.
+
+    The fixed parts of the prompt (instructions, the user's query) are reserved first.
+    Each section is a list of items in importance order (e.g. newest hearing first);
+    sections are filled in priority order, item by item, and a section stops at the
+    first item that no longer fits so it never has gaps. Lower-priority sections still
+    get a chance with whatever budget remains. `report()` says what was dropped.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.used = 0
+        self.dropped = []
+        self._sections = []  # (priority, order, name, items)
+
+    def reserve(self, *texts):
+        """Counts text that is always part of the prompt."""
+        self.used += sum(estimate_tokens(text) for text in texts)
+
+    def add(self, name, items, priority):
+        self._sections.append((priority, len(self._sections), name, [item for item in items if item]))
+
+    def assemble(self):
+        """Returns {section name: kept items, in the order they were given}."""
+        kept = {}
+        for priority, _, name, items in sorted(self._sections):
+            kept[name] = []
+            for index, item in enumerate(items):
+                cost = estimate_tokens(item)
+                if self.used + cost > self.budget:
+                    rest = items[index:]
+                    self.dropped.append({
+                        "section": name,
+                        "items": len(rest),
+                        "tokens": sum(estimate_tokens(text) for text in rest),
+                    })
+                    break
+                kept[name].append(item)
+                self.used += cost
+        return kept
+
+    def report(self):
+        return {"budget": self.budget, "used": self.used, "dropped": self.dropped}
+
+
+class BudgetStats:
+    """Process-wide counters of how often prompts hit the budget, for /admin/stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.trimmed = 0
+        self.dropped_items = {}  # section -> items dropped
+
+    def record(self, task, report):
+        with self._lock:
+            self.prompts += 1
+            if report["dropped"]:
+                self.trimmed += 1
+                for entry in report["dropped"]:
+                    self.dropped_items[entry["section"]] = self.dropped_items.get(entry["section"], 0) + entry["items"]
+        if report["dropped"]:
+            dropped = ", ".join(f"{d['section']} ({d['items']} items, ~{d['tokens']} tokens)" for d in report["dropped"])
+            logger.info(f"{task} prompt trimmed to ~{report['used']}/{report['budget']} tokens, dropped: {dropped}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "prompts": self.prompts,
+                "trimmed": self.trimmed,
+                "trim_rate": round(self.trimmed / self.prompts, 4) if self.prompts else 0.0,
+                "dropped_items": dict(self.dropped_items),
+            }
+
+
+budget_stats = BudgetStats()
@@ -3,26 +3,106 @@ import os
 # attempting to use a non-existent PostgreSQL certificate.
 os.environ.pop('CURL_CA_BUNDLE', None)
 
-import google.generativeai as genai
-import chromadb
 from .config import settings
 from .prompt_templates import SYSTEM_PROMPT
-from . import models, judicial_engine
-import time
+from . import retrieval, embeddings, model_router, case_context, act_router, vector_index, resources
+from .embedding_cache import EmbeddingCache
+from .answer_cache import SemanticAnswerCache
+from .prompt_budget import PromptAssembler, budget_stats
+import re
+import json
 import logging
 
 # ... (Logging setup remains same) ...
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# ... (Gemini/Chroma setup remains same) ...
-if settings.GEMINI_API_KEY:
-    genai.configure(api_key=settings.GEMINI_API_KEY)
-# ...
+# Gemini and Chroma are set up on first use (see resources); importing this module stays cheap
+embedding_provider = embeddings.get_provider()
+
+embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH, memory_size=settings.EMBEDDING_CACHE_SIZE)
+answer_cache = SemanticAnswerCache(
+    threshold=settings.ANSWER_CACHE_THRESHOLD,
+    ttl=settings.ANSWER_CACHE_TTL,
+    maxsize=settings.ANSWER_CACHE_SIZE,
+)
+
+
+# Generation settings per task (plain dicts, which generate_content accepts, so the SDK is not needed at import)
+CHAT_GENERATION_CONFIG = dict(
+    candidate_count=1,
+    max_output_tokens=2048,
+    temperature=0.7,
+    response_mime_type="application/json",
+)
+JUDICIAL_GENERATION_CONFIG = dict(
+    candidate_count=1,
+    max_output_tokens=1024,
+    temperature=0.5, # Lower temperature for more deterministic procedural advice
+)
+CHAT_UNAVAILABLE = "I apologize, but all AI models are currently unavailable or busy. Please try again later."
+JUDICIAL_UNAVAILABLE = "I apologize, but I cannot access the judicial network at the moment. Please consult the Case Tracker directly."
+
+
+class PreparedAnswer:
+    """
+    A chat request after retrieval and prompt assembly: either an immediate `answer`
+    (answer-cache hit or an error message) or the `prompt` to generate from.
+    """
+
+    def __init__(self, prompt=None, answer=None, cache_key=None, budget_report=None):
+        self.prompt = prompt
+        self.answer = answer
+        self.cache_key = cache_key  # (query embedding, language, chunk ids) when the answer may be cached
+        self.budget_report = budget_report  # What the prompt assembler kept and dropped
+
+    def remember(self, answer):
+        if self.cache_key:
+            query_embedding, language, chunk_ids = self.cache_key
+            answer_cache.store(query_embedding, language, chunk_ids, answer)
+
+
+_warned_missing_index = False  # The "index not built" fallback is logged once per process
+
+
+def search_collection():
+    """
+    The vector store retrieval queries: the memory-mapped index (VECTOR_ENGINE=mmap), or
+    the Chroma collection built by the configured embedding provider. Chroma is opened on
+    first use, and with the mmap engine only if that index has not been built yet.
+    """
+    global _warned_missing_index
+    if settings.VECTOR_ENGINE == "mmap":
+        index = vector_index.get_index(embeddings.vector_index_path(embedding_provider))
+        if index is not None:
+            return index
+        if not _warned_missing_index:
+            _warned_missing_index = True
+            logger.warning("Vector index not built (run backend/ingest.py with VECTOR_ENGINE=mmap), using Chroma")
+    return resources.chroma_collection(embedding_provider)
+
+
+def generate_text(model_name, prompt, generation_config):
+    return resources.genai().GenerativeModel(model_name).generate_content(prompt, generation_config=generation_config).text
 
-# Initialize Chroma Client
-chroma_client = chromadb.PersistentClient(path=settings.CHROMA_DB_DIR)
-collection = chroma_client.get_or_create_collection(name="legal_docs")
+
+def _chunk_text(chunk):
+    try:
+        return chunk.text
+    except ValueError:  # A chunk without text parts (e.g. only a finish reason)
+        return ""
+
+
+def stream_text(task, prompt, generation_config):
+    """
+    Yields the raw text of a streamed generation as it arrives, from the model the
+    router picks for `task`. A model that fails before its first chunk is skipped.
+    """
+    def start(model_name):
+        response = resources.genai().GenerativeModel(model_name).generate_content(prompt, generation_config=generation_config, stream=True)
+        return (_chunk_text(chunk) for chunk in response)
+
+    return model_router.router.stream(task, start)
 
 
 def transcribe_audio(audio_bytes, mime_type="audio/webm"):
@@ -30,96 +110,172 @@ def transcribe_audio(audio_bytes, mime_type="audio/webm"):
     if not settings.GEMINI_API_KEY:
         return "Error: GEMINI_API_KEY not found."
 
-    models_to_try = ['gemini-3-flash-preview', 'gemini-2.5-flash', 'gemini-1.5-flash']
-    
-    for model_name in models_to_try:
-        try:
-            # We need to use a model that supports audio
-            audio_model = genai.GenerativeModel(model_name)
-            
-            response = audio_model.generate_content([
-                "Please transcribe this audio accurately. Return only the text. If it is in an Indian language, use the native script (Devanagari/Bengali/Telugu) mixed with English if necessary, or just the script. Do not translate, just transcribe.",
-                {
-                    "mime_type": mime_type,
-                    "data": audio_bytes
-                }
-            ])
-            
-            return response.text.strip()
-        except Exception as e:
-            logger.warning(f"Transcription failed with {model_name}: {e}")
-            continue
+    def transcribe(model_name):
+        # We need to use a model that supports audio
+        audio_model = resources.genai().GenerativeModel(model_name)
+        response = audio_model.generate_content([
+            "Please transcribe this audio accurately. Return only the text. If it is in an Indian language, use the native script (Devanagari/Bengali/Telugu) mixed with English if necessary, or just the script. Do not translate, just transcribe.",
+            {
+                "mime_type": mime_type,
+                "data": audio_bytes
+            }
+        ])
+        return response.text.strip()
+
+    try:
+        return model_router.router.call("transcribe", transcribe)
+    except model_router.AllModelsUnavailable as e:
+        logger.warning(f"Transcription failed: {e}")
 
     return "Error: Transcription failed with all available models."
 
 def get_query_embedding(text):
-   # ... (remains same) ...
-    retries = 3
-    for attempt in range(retries):
-        try:
-            result = genai.embed_content(
-                model="models/text-embedding-004",
-                content=text,
-                task_type="retrieval_query"
-            )
-            return result['embedding']
-        except Exception as e:
-            if "429" in str(e) and attempt < retries - 1:
-                wait_time = 2 * (2 ** attempt)  # Exponential backoff: 2s, 4s, 8s
-                logger.warning(f"Rate limit hit (429). Retrying in {wait_time}s...")
-                time.sleep(wait_time)
+    # Repeated questions (normalized) are served from the cache without a network call
+    cached = embedding_cache.get(embedding_provider.name, text)
+    if cached is not None:
+        return cached
+
+    embedding = embedding_provider.embed_query(text)
+    if embedding:
+        embedding_cache.put(embedding_provider.name, text, embedding)
+    return embedding
+
+def _markdown_bullets(items):
+    markdown_output = ""
+    for item in items:
+        if isinstance(item, dict):
+            title = str(item.get('title') or '').strip()
+            content = str(item.get('content') or '').strip()
+            if title and title.lower() != "none":
+                markdown_output += f"\n* **{title}**: {content}\n"
             else:
-                print(f"Error generating embedding: {e}")
-                return None
+                markdown_output += f"\n* {content}\n"
+    return markdown_output
+
+def render_json_answer(response_text):
+    """Converts the model's JSON answer ([{title, content}, ...]) to markdown bullets."""
+    text_to_parse = response_text.strip()
+
+    # Remove markdown code blocks if present
+    if text_to_parse.startswith("```"):
+        first_newline = text_to_parse.find('\n')
+        if first_newline != -1:
+            text_to_parse = text_to_parse[first_newline+1:]
+        last_backticks = text_to_parse.rfind("```")
+        if last_backticks != -1:
+            text_to_parse = text_to_parse[:last_backticks]
+    text_to_parse = text_to_parse.strip()
 
-def query_rag(query_text: str, history: list = None, language: str = "en", user=None, db=None):
+    try:
+        json_data = json.loads(text_to_parse)
+    except json.JSONDecodeError:
+        # Sometimes model says "Here is the JSON: [...]"
+        match = re.search(r'\[.*\]', response_text, re.DOTALL)
+        if not match:
+            return response_text
+        try:
+            return _markdown_bullets(json.loads(match.group(0)))
+        except Exception:
+            return response_text  # Giving up
+
+    items = json_data
+    if isinstance(json_data, dict):
+        for key, val in json_data.items():
+            if isinstance(val, list):
+                items = val
+                break
+    if isinstance(items, list):
+        return _markdown_bullets(items)
+    # If it parses but isn't a list/dict-list, treat as text
+    return str(items)
+
+def _history_text(kept):
+    """Conversation part of the prompt: the rolling summary, then the recent messages in order."""
+    history_text = ""
+    if kept.get("summary"):
+        history_text += "\nEARLIER CONVERSATION (summary):\n" + kept["summary"][0] + "\n"
+    if kept.get("history"):
+        history_text += "\nRECENT CONVERSATION HISTORY:\n" + "".join(reversed(kept["history"]))
+    return history_text
+
+def prepare_rag(query_text: str, history: list = None, language: str = "en", summary: str = None):
+    """Retrieval and prompt assembly for query_rag, shared with the streaming endpoints."""
     if not settings.GEMINI_API_KEY:
-        return "Error: GEMINI_API_KEY not found in .env settings."
+        return PreparedAnswer(answer="Error: GEMINI_API_KEY not found in .env settings.")
 
 
 
-    # 1. Embed the query (Standard RAG)
-    # Even for judicial queries, we might need legal context (e.g. "What implies Section 420 for my case?")
+    # 1. Explicit statute references ("BNS Section 303", "Article 21") are exact-term
+    # lookups: pull the cited section from the statute index, or failing that answer
+    # from the lexical index, without an embedding request.
+    query_embedding = None
     try:
-        query_embedding = get_query_embedding(query_text) 
+        hits = retrieval.statute_fast_path(query_text) or retrieval.lexical_fast_path(query_text, n_results=3)
     except Exception as e:
-        return f"Error generating embedding: {str(e)}"
+        logger.warning(f"Lexical lookup failed: {e}")
+        hits = None
 
-    # 2. Retrieve from ChromaDB
+    if hits is None:
+        # Embed the query (Standard RAG)
+        # Even for judicial queries, we might need legal context (e.g. "What implies Section 420 for my case?")
+        try:
+            query_embedding = get_query_embedding(query_text) 
+        except Exception as e:
+            return PreparedAnswer(answer=f"Error generating embedding: {str(e)}")
+
+    # 2. Retrieve: dense (ChromaDB) fused with lexical (BM25) over the act(s) the query is about,
+    # de-duplicated and MMR re-ranked
     context_text = ""
-    if query_embedding:
+    chunk_ids = []
+    if hits is None and query_embedding:
         try:
-            results = collection.query(
-                query_embeddings=[query_embedding], 
-                n_results=3, 
-                include=['documents', 'metadatas']
-            )
-            
-            if results['documents'] and results['documents'][0]:
-                docs = results['documents'][0]
-                metas = results['metadatas'][0]
-                
-                formatted_snippets = []
-                for i, doc in enumerate(docs):
-                    source = metas[i].get('source', 'Unknown')
-                    page = metas[i].get('page', '?')
-                    # Strict Citation (Phase 6)
-                    formatted_snippets.append(f"SOURCE: {source} (Page {page})\nCONTENT: {doc}")
-                context_text = "\n---\n".join(formatted_snippets)
-            else:
-                context_text = "No specific relevant legal documents found in database."
+            # Up to 5 hits; MMR returns fewer when only one or two chunks are really relevant
+            hits = retrieval.hybrid_search(search_collection(), query_text, query_embedding, n_results=5,
+                                           acts=act_router.router.route(query_text))
         except Exception as e:
-            return f"Error retrieving documents: {str(e)}"
+            return PreparedAnswer(answer=f"Error retrieving documents: {str(e)}")
+
+    formatted_snippets = []
+    if hits:
+        chunk_ids = [hit["id"] for hit in hits]
+        for hit in hits:
+            source = hit["metadata"].get('source', 'Unknown')
+            page = hit["metadata"].get('page', '?')
+            # Strict Citation (Phase 6)
+            formatted_snippets.append(f"SOURCE: {source} (Page {page})\nCONTENT: {hit['document']}")
+    elif hits is not None:
+        context_text = "No specific relevant legal documents found in database."
     else:
         context_text = "Could not retrieve documents due to embedding error."
 
-    # 2. Augment Prompt with History
-    history_text = ""
-    if history:
-        history_text = "\nRECENT CONVERSATION HISTORY:\n"
-        for msg in history:
-            role = "User" if msg.get("role") == "user" else "NyayaSetu"
-            history_text += f"{role}: {msg.get('content')}\n"
+    # Semantic answer cache: only for stand-alone questions. With history the answer
+    # depends on the conversation, so it can be neither served from nor stored in the cache.
+    use_answer_cache = bool(query_embedding) and not history and not summary
+    if use_answer_cache:
+        cached_answer = answer_cache.lookup(query_embedding, language, chunk_ids)
+        if cached_answer is not None:
+            return PreparedAnswer(answer=cached_answer)
+    elif query_embedding:
+        answer_cache.record_bypass()
+
+    # 2. Augment Prompt with History, all packed into the token budget (summary of the earlier
+    # conversation, retrieved law, then recent messages newest first, so the oldest go first)
+    history_lines = [
+        f"{'User' if msg.get('role') == 'user' else 'NyayaSetu'}: {msg.get('content')}\n"
+        for msg in reversed(history or [])
+    ]
+    assembler = PromptAssembler(settings.PROMPT_TOKEN_BUDGET)
+    assembler.reserve(SYSTEM_PROMPT, query_text, context_text)
+    assembler.add("summary", [summary], priority=1)
+    assembler.add("retrieved_law", formatted_snippets, priority=2)
+    assembler.add("history", history_lines, priority=3)
+    kept = assembler.assemble()
+    report = assembler.report()
+    budget_stats.record("chat", report)
+
+    if formatted_snippets:
+        context_text = "\n---\n".join(kept["retrieved_law"]) or "Retrieved legal documents were too long to include."
+    history_text = _history_text(kept)
     
     # Map language code to full name
     lang_map = {
@@ -160,142 +316,81 @@ ANSWER:
     """
     final_prompt = full_prompt + json_instruction
 
-    retries = 3
-    final_response_text = ""
-    
-    # Configure for JSON
-    generation_config = genai.types.GenerationConfig(
-        candidate_count=1,
-        max_output_tokens=2048,
-        temperature=0.7,
-        response_mime_type="application/json",
-    )
-    
-    # Model Priority List
-    # Try gemini-3-flash-preview first, then fallback to gemini-2.5-flash
-    # Note: Using known valid model names. If user specified custom names, we use them.
-    # Assuming 'gemini-1.5-flash' is the actual stable one, but user asked for 2.5/3.
-    # I will use the user's requested names, but if they fail, I'll keep 1.5-flash as a safety net.
-    # User Request: ['gemini-2.5-flash', 'gemini-3-flash-preview']
-    
-    # NOTE: 'gemini-3-flash-preview' and 'gemini-2.5-flash' are likely hypothetical or experimental names 
-    # that might not exist yet in the public API. 
-    # However, to strictly follow user instructions, I will put their requested strings.
-    # BUT, to ensure the app doesn't crash if they are invalid, I will keep 1.5-flash as final fallback.
-    
-    models_to_try = ['gemini-3-flash-preview', 'gemini-2.5-flash', 'gemini-1.5-flash']
+    cache_key = (query_embedding, language, chunk_ids) if use_answer_cache else None
+    return PreparedAnswer(prompt=final_prompt, cache_key=cache_key, budget_report=report)
 
-    import json
 
-    final_response_text = ""
-    success = False
+def query_rag(query_text: str, history: list = None, language: str = "en", user=None, db=None, summary: str = None):
+    prepared = prepare_rag(query_text, history=history, language=language, summary=summary)
+    if prepared.answer is not None:
+        return prepared.answer
 
-    for model_name in models_to_try:
-        if success: break
-        
-        try:
-            current_model = genai.GenerativeModel(model_name)
-            # print(f"Trying model: {model_name}") # Debug
-            
-            response = current_model.generate_content(final_prompt, generation_config=generation_config)
-            
-            # Parse JSON
-            try:
-                # Clean up the response text
-                text_to_parse = response.text.strip()
-                
-                # Remove markdown code blocks if present
-                if text_to_parse.startswith("```"):
-                    # Find first newline
-                    first_newline = text_to_parse.find('\n')
-                    if first_newline != -1:
-                        text_to_parse = text_to_parse[first_newline+1:]
-                    # Find last code block marker
-                    last_backticks = text_to_parse.rfind("```")
-                    if last_backticks != -1:
-                        text_to_parse = text_to_parse[:last_backticks]
-                
-                text_to_parse = text_to_parse.strip()
-                
-                json_data = json.loads(text_to_parse)
-                
-                # Convert to Markdown bullets
-                markdown_output = ""
-                items = json_data
-                if isinstance(json_data, dict):
-                     for key, val in json_data.items():
-                        if isinstance(val, list):
-                            items = val
-                            break
-                            
-                if isinstance(items, list):
-                    for item in items:
-                        title = item.get('title', '').strip()
-                        content = item.get('content', '').strip()
-                        if title and title.lower() != "none":
-                            markdown_output += f"\n* **{title}**: {content}\n"
-                        else:
-                            markdown_output += f"\n* {content}\n"
-                    final_response_text = markdown_output
-                    success = True # Success!
-                else:
-                    # If it parses but isn't a list/dict-list, treat as text
-                    final_response_text = str(items)  # Or keep response.text? Better to use parsed content.
-                    success = True
-            except json.JSONDecodeError:
-                # Fallback: Try to use regex to find the JSON list part
-                # Sometimes model says "Here is the JSON: [...]"
-                import re
-                match = re.search(r'\[.*\]', response.text, re.DOTALL)
-                if match:
-                    try:
-                        json_data = json.loads(match.group(0))
-                        # Reuse the list formatting logic? For now, recursive call or simple logic.
-                        # Duplicate logic for safety/speed:
-                        markdown_output = ""
-                        for item in json_data:
-                            if isinstance(item, dict):
-                                title = item.get('title', '').strip()
-                                content = item.get('content', '').strip()
-                                if title and title.lower() != "none":
-                                    markdown_output += f"\n* **{title}**: {content}\n"
-                                else:
-                                    markdown_output += f"\n* {content}\n"
-                        final_response_text = markdown_output
-                        success = True
-                    except Exception:
-                        final_response_text = response.text # Giving up
-                        success = True
-                else:
-                    final_response_text = response.text
-                    success = True
-
-        except Exception as e:
-            # If error (limit hit or model not found), continue to next model
-            # logger.warning(f"Model {model_name} failed: {e}")
-            continue
-            
-    if not success:
-        final_response_text = "I apologize, but all AI models are currently unavailable or busy. Please try again later."
-    
+    # The shared model router picks the fastest healthy model and skips ones whose circuit is open
+    try:
+        response_text = model_router.router.call(
+            "chat", lambda model_name: generate_text(model_name, prepared.prompt, CHAT_GENERATION_CONFIG), hedge=settings.LLM_HEDGING
+        )
+    except model_router.AllModelsUnavailable as e:
+        logger.warning(f"query_rag: {e}")
+        return CHAT_UNAVAILABLE
+
+    final_response_text = render_json_answer(response_text)
+    prepared.remember(final_response_text)
     return final_response_text
 
 
-def query_judicial_rag(query_text: str, history: list = None, language: str = "en", user=None, db=None, focused_case_id: int = None):
+def _case_overview(snapshot, query_text):
+    summary = snapshot.summary
+    # Add next steps if relevant to query
+    if str(snapshot.id) in query_text or snapshot.title.lower() in query_text.lower() or "my case" in query_text.lower():
+        summary += f"  Recommended Next Step: {snapshot.next_step()}\n"
+    return summary
+
+
+def _render_focused_case(c, kept, sections):
+    """Focused-case context from the pieces that fit the budget, noting what was left out."""
+    judicial_context = kept["focused_case"][0] if kept["focused_case"] else f"\n=== FOCUSED CASE: Case #{c.id}: {c.title} ===\n"
+
+    hearings = list(reversed(kept["hearings"]))  # Back to chronological order
+    total = len(sections["hearings"][1])
+    if total:
+        shown = f", {len(hearings)} most recent shown" if len(hearings) < total else ""
+        judicial_context += f"\nHEARINGS ({total} total{shown}):\n" + "".join(hearings)
+    else:
+        judicial_context += "\nHEARINGS: None recorded yet.\n"
+
+    evidence = kept["focused_case"][1:]
+    total = len(sections["focused_case"][1]) - 1
+    if total:
+        shown = f", {len(evidence)} shown" if len(evidence) < total else ""
+        judicial_context += f"\nEVIDENCE ({total} documents{shown}):\n" + "".join(evidence)
+    else:
+        judicial_context += "\nEVIDENCE: No documents submitted yet.\n"
+
+    if kept.get("other_cases"):
+        judicial_context += f"\nUser also has {len(sections['other_cases'][1])} other case(s): "
+        judicial_context += ", ".join(kept["other_cases"])
+        judicial_context += "\n"
+    return judicial_context
+
+
+def prepare_judicial_rag(query_text: str, history: list = None, language: str = "en", user=None, db=None, focused_case_id: int = None, summary: str = None):
     """
     RAG Logic specifically for Judicial Procedural Guidance.
     Prioritizes User's Case Data over general legal documents.
     If focused_case_id is provided, gives deep context for that specific case.
     """
     if not settings.GEMINI_API_KEY:
-        return "Error: GEMINI_API_KEY not found in .env settings."
+        return PreparedAnswer(answer="Error: GEMINI_API_KEY not found in .env settings.")
 
-    # 1. Fetch User's Cases (Primary Data Source)
+    # 1. Fetch User's Cases (Primary Data Source), as prompt sections packed by priority below
+    sections = {}  # name -> (priority, items in importance order)
     judicial_context = ""
     user_cases = []
     focused_case = None
     if user and db:
-        user_cases = db.query(models.Case).filter(models.Case.user_id == user.id).all()
+        # Snapshots of the user's cases, rebuilt only for cases changed since the last turn
+        user_cases = case_context.case_cache.load(db, user.id)
         
         # If a specific case is focused, find it
         if focused_case_id:
@@ -303,104 +398,17 @@ def query_judicial_rag(query_text: str, history: list = None, language: str = "e
         
         if focused_case:
             # DEEP context for the focused case
-            c = focused_case
-            judicial_context = f"\n=== FOCUSED CASE (User is asking about this case) ===\n"
-            judicial_context += f"Case #{c.id}: {c.title}\n"
-            judicial_context += f"CNR: {c.cnr_number or 'Not yet registered'}\n"
-            judicial_context += f"Type: {c.case_type} | Status: {c.status} | Current Stage: {c.current_stage}\n"
-            judicial_context += f"Description: {c.description}\n"
-            judicial_context += f"Plaintiff: {c.plaintiff_name} (Lawyer: {c.plaintiff_lawyer})\n"
-            judicial_context += f"Defendant: {c.defendant_name} (Lawyer: {c.defendant_lawyer})\n"
-            judicial_context += f"User's Role: {c.user_role}\n"
-            judicial_context += f"Registered: {c.created_at.strftime('%d %b %Y')}\n"
-            
-            # All hearing details
-            if c.hearings:
-                judicial_context += f"\nHEARINGS ({len(c.hearings)} total):\n"
-                for i, h in enumerate(c.hearings, 1):
-                    judicial_context += f"  {i}. {h.date.strftime('%d %b %Y')}"
-                    if h.court_name:
-                        judicial_context += f" at {h.court_name}"
-                    if h.judge_name:
-                        judicial_context += f" (Judge: {h.judge_name})"
-                    if h.observation:
-                        judicial_context += f" — {h.observation}"
-                    if h.next_hearing_date:
-                        judicial_context += f" | Next: {h.next_hearing_date.strftime('%d %b %Y')}"
-                    judicial_context += "\n"
-            else:
-                judicial_context += "\nHEARINGS: None recorded yet.\n"
-            
-            # All evidence details
-            if c.documents:
-                judicial_context += f"\nEVIDENCE ({len(c.documents)} documents):\n"
-                for d in c.documents:
-                    judicial_context += f"  - [{d.party}] {d.title} ({d.doc_type or 'General'})"
-                    if d.content:
-                        judicial_context += f": {d.content[:150]}"
-                    judicial_context += "\n"
-            else:
-                judicial_context += "\nEVIDENCE: No documents submitted yet.\n"
-            
-            # Judgment
-            if c.judgment:
-                judicial_context += f"\nJUDGMENT: {c.judgment.verdict} on {c.judgment.date.strftime('%d %b %Y')}\n"
-                if c.judgment.summary:
-                    judicial_context += f"Summary: {c.judgment.summary}\n"
-                if c.judgment.pronounced_by:
-                    judicial_context += f"Pronounced by: {c.judgment.pronounced_by}\n"
-            
-            # Timeline and next steps
-            timeline = judicial_engine.generate_timeline(c.events, c.current_stage)
-            next_step = judicial_engine.recommend_next_step(c.current_stage, c.case_type)
-            judicial_context += f"\nRecommended Next Step: {next_step}\n"
-            
+            sections["focused_case"] = (0, [focused_case.core] + focused_case.evidence_lines)
+            sections["hearings"] = (1, list(reversed(focused_case.hearing_lines)))  # Most recent first
+
             # Other cases (brief summary)
             other_cases = [oc for oc in user_cases if oc.id != focused_case_id]
             if other_cases:
-                judicial_context += f"\nUser also has {len(other_cases)} other case(s): "
-                judicial_context += ", ".join([f"{oc.title} ({oc.current_stage})" for oc in other_cases])
-                judicial_context += "\n"
+                sections["other_cases"] = (4, [f"{oc.title} ({oc.current_stage})" for oc in other_cases])
         
         elif user_cases:
-            judicial_context = "\nUSER'S LEGAL CASES:\n"
-            for case in user_cases:
-                judicial_context += f"\n--- CASE #{case.id}: {case.title} ---\n"
-                judicial_context += f"  CNR: {case.cnr_number or 'Not registered'}\n"
-                judicial_context += f"  Type: {case.case_type} | Status: {case.status} | Stage: {case.current_stage}\n"
-                judicial_context += f"  Description: {case.description or 'N/A'}\n"
-                judicial_context += f"  Plaintiff: {case.plaintiff_name} (Lawyer: {case.plaintiff_lawyer})\n"
-                judicial_context += f"  Defendant: {case.defendant_name} (Lawyer: {case.defendant_lawyer})\n"
-                judicial_context += f"  User's Role: {case.user_role}\n"
-                judicial_context += f"  Registered: {case.created_at.strftime('%d %b %Y')}\n"
-                
-                # Hearing info
-                if case.hearings:
-                    judicial_context += f"  Total Hearings: {len(case.hearings)}\n"
-                    last_hearing = case.hearings[-1]
-                    judicial_context += f"  Last Hearing: {last_hearing.date.strftime('%d %b %Y')}"
-                    if last_hearing.observation:
-                        judicial_context += f" — {last_hearing.observation[:100]}"
-                    judicial_context += "\n"
-                    if last_hearing.next_hearing_date:
-                        judicial_context += f"  Next Hearing: {last_hearing.next_hearing_date.strftime('%d %b %Y')}\n"
-                
-                # Evidence info  
-                plaintiff_docs = [d for d in case.documents if d.party == 'Plaintiff']
-                defendant_docs = [d for d in case.documents if d.party == 'Defendant']
-                judicial_context += f"  Evidence: {len(plaintiff_docs)} from Plaintiff, {len(defendant_docs)} from Defendant\n"
-                
-                # Judgment info
-                if case.judgment:
-                    judicial_context += f"  JUDGMENT: {case.judgment.verdict} on {case.judgment.date.strftime('%d %b %Y')}\n"
-                    if case.judgment.summary:
-                        judicial_context += f"  Judgment Summary: {case.judgment.summary[:200]}\n"
-                
-                # Add timeline/next steps if relevant to query
-                if str(case.id) in query_text or case.title.lower() in query_text.lower() or "my case" in query_text.lower():
-                     timeline = judicial_engine.generate_timeline(case.events, case.current_stage)
-                     next_step = judicial_engine.recommend_next_step(case.current_stage, case.case_type)
-                     judicial_context += f"  Recommended Next Step: {next_step}\n"
+            recent_first = sorted(user_cases, key=lambda case: case.updated_at or case.created_at, reverse=True)
+            sections["cases"] = (0, [_case_overview(case, query_text) for case in recent_first])
         else:
             judicial_context = "\nUSER'S CASES: No active cases registered in the system.\n"
 
@@ -408,30 +416,29 @@ def query_judicial_rag(query_text: str, history: list = None, language: str = "e
     # We still fetch this because the user might ask "How do I file a divorce case?" (General procedure)
     context_text = ""
     try:
-        query_embedding = get_query_embedding(query_text)
-        if query_embedding:
-            results = collection.query(
-                query_embeddings=[query_embedding], 
-                n_results=2, # Less context needed than main bot
-                include=['documents', 'metadatas']
-            )
-            if results['documents'] and results['documents'][0]:
-                 formatted_snippets = []
-                 for i, doc in enumerate(results['documents'][0]):
-                    source = results['metadatas'][0][i].get('source', 'Unknown')
-                    formatted_snippets.append(f"SOURCE: {source}\nCONTENT: {doc}")
-                 context_text = "\n---\n".join(formatted_snippets)
+        hits = retrieval.statute_fast_path(query_text) or retrieval.lexical_fast_path(query_text, n_results=2)
+        if hits is None:
+            query_embedding = get_query_embedding(query_text)
+            if query_embedding:
+                hits = retrieval.hybrid_search(search_collection(), query_text, query_embedding, n_results=3, # Less context needed than main bot
+                                               acts=act_router.router.route(query_text))
+        if hits:
+            sections["retrieved_law"] = (2, [
+                f"SOURCE: {hit['metadata'].get('source', 'Unknown')}\nCONTENT: {hit['document']}" for hit in hits
+            ])
     except Exception as e:
         logger.warning(f"Judicial embedding failed: {e}")
         context_text = "General legal database unavailable."
 
-    # 3. History
-    history_text = ""
+    # 3. History: the summary of the earlier conversation, then recent messages newest first
+    # (so the oldest messages are the first to go)
+    if summary:
+        sections["summary"] = (1, [summary])
     if history:
-        history_text = "\nRECENT CONVERSATION HISTORY:\n"
-        for msg in history:
-            role = "User" if msg.get("role") == "user" else "Judicial Assistant"
-            history_text += f"{role}: {msg.get('content')}\n"
+        sections["history"] = (3, [
+            f"{'User' if msg.get('role') == 'user' else 'Judicial Assistant'}: {msg.get('content')}\n"
+            for msg in reversed(history)
+        ])
 
     # 4. Prompt Construction
     lang_map = {
@@ -471,6 +478,26 @@ GUIDELINES:
 9. If the user has a Public Prosecutor as their lawyer, provide more detailed procedural guidance since they may be self-representing.
 """
 
+    # 5. Pack the sections into the token budget: focused case, recent hearings, retrieved law, history
+    assembler = PromptAssembler(settings.PROMPT_TOKEN_BUDGET)
+    assembler.reserve(system_prompt, judicial_context, context_text, query_text)
+    for name, (priority, items) in sections.items():
+        assembler.add(name, items, priority)
+    kept = assembler.assemble()
+    report = assembler.report()
+    budget_stats.record("judicial", report)
+
+    if focused_case:
+        judicial_context = _render_focused_case(focused_case, kept, sections)
+    elif "cases" in sections:
+        judicial_context = "\nUSER'S LEGAL CASES:\n" + "".join(kept["cases"])
+        omitted = len(sections["cases"][1]) - len(kept["cases"])
+        if omitted:
+            judicial_context += f"\n({omitted} older case(s) not shown)\n"
+    if kept.get("retrieved_law"):
+        context_text = "\n---\n".join(kept["retrieved_law"])
+    history_text = _history_text(kept)
+
     full_prompt = f"""{system_prompt}
 
 USER'S CASE DATA:
@@ -487,21 +514,19 @@ IMPORTANT: Provide the response strictly in **{target_lang}**.
 Formatted as Markdown.
 """
 
-    # 5. Generate
-    # Using the same model list and fallback logic as query_rag
-    models_to_try = ['gemini-3-flash-preview', 'gemini-2.5-flash', 'gemini-1.5-flash']
-    generation_config = genai.types.GenerationConfig(
-        candidate_count=1,
-        max_output_tokens=1024,
-        temperature=0.5, # Lower temperature for more deterministic procedural advice
-    )
+    return PreparedAnswer(prompt=full_prompt, budget_report=report)
 
-    for model_name in models_to_try:
-        try:
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(full_prompt, generation_config=generation_config)
-            return response.text
-        except Exception:
-            continue
 
-    return "I apologize, but I cannot access the judicial network at the moment. Please consult the Case Tracker directly."
+def query_judicial_rag(query_text: str, history: list = None, language: str = "en", user=None, db=None, focused_case_id: int = None, summary: str = None):
+    prepared = prepare_judicial_rag(query_text, history=history, language=language, user=user, db=db, focused_case_id=focused_case_id, summary=summary)
+    if prepared.answer is not None:
+        return prepared.answer
+
+    # Routed like query_rag: fastest healthy model first, open circuits skipped
+    try:
+        return model_router.router.call(
+            "judicial", lambda model_name: generate_text(model_name, prepared.prompt, JUDICIAL_GENERATION_CONFIG), hedge=settings.LLM_HEDGING
+        )
+    except model_router.AllModelsUnavailable as e:
+        logger.warning(f"query_judicial_rag: {e}")
+        return JUDICIAL_UNAVAILABLE
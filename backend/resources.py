@@ -0,0 +1,51 @@
+import threading
+from .config import settings
+
+# Heavy process-wide clients, created on first use instead of at import time, so importing
+# the app (a cold start or a worker restart) does not pay for them. Importing the Gemini
+# SDK and chromadb alone takes seconds. The lifespan warm-up in main.py creates them
+# before the worker reports ready.
+
+_lock = threading.Lock()
+_genai = None
+_chroma_client = None
+_collections = {}  # embedding provider name -> Chroma collection
+
+
+def genai():
+    """The google.generativeai module, imported and configured with the API key on first use."""
+    global _genai
+    if _genai is None:
+        with _lock:
+            if _genai is None:
+                import google.generativeai as module
+                if settings.GEMINI_API_KEY:
+                    module.configure(api_key=settings.GEMINI_API_KEY)
+                _genai = module
+    return _genai
+
+
+def chroma_client():
+    """The Chroma PersistentClient over CHROMA_DB_DIR, opened on first use."""
+    global _chroma_client
+    if _chroma_client is None:
+        with _lock:
+            if _chroma_client is None:
+                import chromadb
+                _chroma_client = chromadb.PersistentClient(path=settings.CHROMA_DB_DIR)
+    return _chroma_client
+
+
+def chroma_collection(provider=None):
+    """The Chroma collection built by an embedding provider (the configured one by default)."""
+    from . import embeddings
+    provider = provider or embeddings.get_provider()
+    collection = _collections.get(provider.name)
+    if collection is None:
+        client = chroma_client()
+        with _lock:
+            collection = _collections.get(provider.name)
+            if collection is None:
+                collection = embeddings.get_collection(client, provider)
+                _collections[provider.name] = collection
+    return collection
@@ -0,0 +1,198 @@
+import re
+import numpy as np
+from .config import settings
+from . import lexical_index, statute_index
+
+RRF_K = 60  # Standard reciprocal-rank-fusion damping constant
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Fuses several ranked hit lists into one. Each hit scores sum(1 / (k + rank))
+    over the lists it appears in, so agreement between retrievers wins.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, 1):
+            entry = fused.setdefault(hit["id"], {"hit": hit, "score": 0.0})
+            entry["score"] += 1.0 / (k + rank)
+    ranked = sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)
+    return [dict(entry["hit"], score=entry["score"]) for entry in ranked]
+
+
+def get_lexical_index():
+    return lexical_index.get_index(settings.LEXICAL_INDEX_PATH)
+
+
+def get_statute_index():
+    return statute_index.get_index(settings.STATUTE_INDEX_PATH)
+
+
+def statute_fast_path(query_text, max_chars=4000):
+    """
+    Exact text of the sections/articles the query cites, straight from the statute
+    index: no embedding request and no vector search. None if nothing is cited.
+    """
+    index = get_statute_index()
+    if index is None:
+        return None
+    provisions = index.cited_provisions(query_text)
+    if not provisions:
+        return None
+    hits = []
+    for provision in provisions:
+        text = provision["text"]
+        if len(text) > max_chars:
+            text = text[:max_chars].rsplit(" ", 1)[0] + " …[truncated]"
+        hits.append({
+            "id": f"statute:{provision['act']}:{provision['number']}",
+            "document": text,
+            "metadata": {"source": statute_index.citation(provision), "page": provision["page"]},
+        })
+    return hits
+
+
+def lexical_fast_path(query_text, n_results=3):
+    """
+    Answers explicit statute references ("BNS Section 303", "Article 21") straight from
+    the lexical index, with no embedding request. Returns None when the query has no
+    reference or nothing matched, so the caller falls back to hybrid search.
+    """
+    index = get_lexical_index()
+    if index is None:
+        return None
+    refs = lexical_index.parse_references(query_text)
+    if not refs:
+        return None
+    hits = index.lookup_references(query_text, refs, n_results=n_results)
+    return hits or None
+
+
+def act_filter(acts):
+    """Chroma `where` clause restricting a search to chunks of the given act codes."""
+    if not acts:
+        return None
+    if len(acts) == 1:
+        return {"act": acts[0]}
+    return {"act": {"$in": list(acts)}}
+
+
+def dense_search(collection, query_embedding, n_results, with_embeddings=False, acts=None):
+    include = ['documents', 'metadatas', 'embeddings'] if with_embeddings else ['documents', 'metadatas']
+    results = collection.query(
+        query_embeddings=[query_embedding],
+        n_results=n_results,
+        where=act_filter(acts),
+        include=include
+    )
+    if not results['documents'] or not results['documents'][0]:
+        return []
+    hits = [
+        {"id": doc_id, "document": doc, "metadata": meta}
+        for doc_id, doc, meta in zip(results['ids'][0], results['documents'][0], results['metadatas'][0])
+    ]
+    if with_embeddings:
+        for hit, embedding in zip(hits, results['embeddings'][0]):
+            hit["embedding"] = embedding
+    return hits
+
+
+def _unit_rows(vectors):
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def _normalized_text(text):
+    return re.sub(r"\W+", " ", text or "").strip().lower()
+
+
+def mmr_select(query_embedding, hits, max_results, lambda_mult=0.7, duplicate_threshold=0.95, min_relative_score=0.8):
+    """
+    Maximal-marginal-relevance selection over candidate hits that carry an "embedding".
+
+    The first candidate (the fused top hit) is always kept. Then, until `max_results`:
+    candidates that repeat a selected chunk (same text, or cosine similarity of at least
+    `duplicate_threshold`) are dropped, as are candidates whose similarity to the query
+    falls below `min_relative_score` times the best candidate's, and the next pick is the
+    one maximising lambda * relevance - (1 - lambda) * similarity to what is already
+    selected. So k adapts to the query: a single clearly relevant section comes back
+    alone instead of padded with overlapping neighbours.
+    """
+    if not hits:
+        return []
+    vectors = _unit_rows([hit["embedding"] for hit in hits])
+    relevance = vectors @ _unit_rows(query_embedding)[0]
+    similarity = vectors @ vectors.T
+    best = float(relevance.max())
+    cutoff = best * min_relative_score if best > 0 else float("-inf")
+    texts = [_normalized_text(hit["document"]) for hit in hits]
+
+    selected = [0]
+    remaining = set(range(1, len(hits)))
+    while remaining and len(selected) < max_results:
+        redundancy = similarity[:, selected].max(axis=1)
+        seen_texts = {texts[i] for i in selected}
+        remaining = {
+            i for i in remaining
+            if redundancy[i] < duplicate_threshold and texts[i] not in seen_texts and relevance[i] >= cutoff
+        }
+        if not remaining:
+            break
+        pick = max(remaining, key=lambda i: lambda_mult * relevance[i] - (1 - lambda_mult) * redundancy[i])
+        selected.append(pick)
+        remaining.discard(pick)
+    return [dict(hits[i], relevance=round(float(relevance[i]), 4)) for i in selected]
+
+
+def _attach_embeddings(collection, hits):
+    """Fills in stored embeddings for hits that came from the lexical index only (one Chroma get)."""
+    missing = [hit["id"] for hit in hits if hit.get("embedding") is None]
+    if not missing:
+        return
+    stored = collection.get(ids=missing, include=['embeddings'])
+    if stored['embeddings'] is None:
+        return
+    by_id = dict(zip(stored['ids'], stored['embeddings']))
+    for hit in hits:
+        if hit.get("embedding") is None and hit["id"] in by_id:
+            hit["embedding"] = by_id[hit["id"]]
+
+
+def hybrid_search(collection, query_text, query_embedding, n_results=3, candidates=None, acts=None):
+    """
+    Dense (Chroma) and lexical (BM25) retrieval fused with reciprocal rank fusion over an
+    over-fetched candidate pool, then de-duplicated and re-ranked with MMR (see mmr_select).
+    `n_results` is the most hits returned; fewer come back when the rest score well below
+    the best one or only repeat it. `acts` (act codes, see act_router) restricts both
+    retrievers to those acts' chunks.
+    """
+    candidates = candidates or settings.RETRIEVAL_CANDIDATES
+    dense_hits = dense_search(collection, query_embedding, candidates, with_embeddings=True, acts=acts)
+    if acts and not dense_hits:
+        # Nothing tagged with these acts (not ingested, or stored before chunks carried "act")
+        acts = None
+        dense_hits = dense_search(collection, query_embedding, candidates, with_embeddings=True)
+    index = get_lexical_index()
+    if index is None or not len(index):
+        fused = dense_hits
+    else:
+        lexical_hits = index.search(query_text, n_results=candidates, acts=acts)
+        fused = [dict(hit) for hit in reciprocal_rank_fusion([dense_hits, lexical_hits])[:candidates]]
+        _attach_embeddings(collection, fused)
+    pool = [hit for hit in fused if hit.get("embedding") is not None]
+    if not pool:
+        return [_without_embedding(hit) for hit in fused[:n_results]]
+    selected = mmr_select(
+        query_embedding, pool, n_results,
+        lambda_mult=settings.RETRIEVAL_MMR_LAMBDA,
+        duplicate_threshold=settings.RETRIEVAL_DUPLICATE_THRESHOLD,
+        min_relative_score=settings.RETRIEVAL_MIN_RELATIVE_SCORE,
+    )
+    return [_without_embedding(hit) for hit in selected]
+
+
+def _without_embedding(hit):
+    return {key: value for key, value in hit.items() if key != "embedding"}
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+from .. import models, auth, model_router, case_context, act_router, doc_processor, jobs
+from ..prompt_budget import budget_stats
+from .. import rag_engine
+
+router = APIRouter(tags=["Admin"])
+
+@router.get("/admin/stats")
+async def runtime_stats(current_admin: models.User = Depends(auth.get_current_user_from_cookie)):
+    """Operator view of model health, hedge rates, prompt trimming and cache hit rates for this worker process."""
+    if not current_admin:
+         raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_admin.role != "admin":
+         raise HTTPException(status_code=403, detail="Not authorized. Admin access required.")
+
+    return {
+        **model_router.router.stats(),
+        "embedding_cache": rag_engine.embedding_cache.stats(),
+        "answer_cache": rag_engine.answer_cache.stats(),
+        "case_context_cache": case_context.case_cache.stats(),
+        "prompt_budget": budget_stats.stats(),
+        "act_routing": act_router.router.stats(),
+        "document_pages": doc_processor.stats(),
+        "document_cache": doc_processor.document_cache.stats(),
+        "jobs": jobs.stats(),
+    }
@@ -1,20 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, Cookie, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime
+import asyncio
 import logging
-from .. import schemas, models, database, auth
+from .. import schemas, models, database, auth, llm_executor, rag_engine, model_router, conversation_memory
 from ..rag_engine import query_rag, query_judicial_rag
+from ..streaming import JsonBulletStream, sse_event
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Chat"])
 
-@router.post("/chat_session", response_model=schemas.ChatResponse)
-async def chat_session_endpoint(request: schemas.ChatRequest, user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
-    if not user:
-         raise HTTPException(status_code=401, detail="Not authenticated")
-    
+def _start_chat_turn(request: schemas.ChatRequest, user: models.User, db: Session):
+    """
+    Finds or creates the session, adds the user's message and returns (session, history):
+    the messages not yet folded into session.summary, which goes into the prompt with them.
+    """
     session = None
     if request.session_id:
         session = db.query(models.ChatSession).filter(models.ChatSession.id == request.session_id, models.ChatSession.user_id == user.id).first()
@@ -32,19 +36,19 @@ async def chat_session_endpoint(request: schemas.ChatRequest, user: models.User
         session.title = request.message[:30] + "..." if len(request.message) > 30 else request.message
         db.add(session)
 
-    previous_messages = db.query(models.Message).filter(
-        models.Message.session_id == session.id
-    ).order_by(models.Message.timestamp.desc()).limit(11).all()
-    previous_messages.reverse()
+    history_context = conversation_memory.recent_history(db, models.Message, session, exclude_id=user_msg.id)
+    return session, history_context
+
+@router.post("/chat_session", response_model=schemas.ChatResponse)
+async def chat_session_endpoint(request: schemas.ChatRequest, user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
+    if not user:
+         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    history_context = []
-    for msg in previous_messages:
-        if msg.id != user_msg.id:
-             history_context.append({"role": msg.role, "content": msg.content})
+    session, history_context = _start_chat_turn(request, user, db)
 
     response_text = ""
     try:
-        response_text = query_rag(request.message, history=history_context, language=user.preferred_language, user=user, db=db)
+        response_text = await llm_executor.run_blocking(query_rag, request.message, history=history_context, language=user.preferred_language, user=user, db=db, summary=session.summary)
     except Exception as e:
         logger.error(f"RAG error: {e}", exc_info=True)
         response_text = "I'm sorry, there was an internal error processing your request. Please try again."
@@ -54,6 +58,7 @@ async def chat_session_endpoint(request: schemas.ChatRequest, user: models.User
     
     session.updated_at = datetime.utcnow()
     db.commit()
+    conversation_memory.summarize_in_background(models.ChatSession, models.Message, session.id)
     
     return schemas.ChatResponse(response=response_text, session_id=session.id)
 
@@ -70,7 +75,7 @@ async def chat_endpoint(request: schemas.ChatRequest, response: Response, chat_c
         return schemas.ChatResponse(response="You have reached the free limit of 5 messages. Please [Login](/login) or [Register](/register) to continue.")
 
     try:
-        response_text = query_rag(request.message, language="en")
+        response_text = await llm_executor.run_blocking(query_rag, request.message, language="en")
     except Exception as e:
         logger.error(f"Guest chat RAG error: {e}", exc_info=True)
         response_text = "I'm sorry, there was an error processing your request. Please try again."
@@ -94,11 +99,8 @@ async def delete_chat_session(session_id: int, user: models.User = Depends(auth.
 
 # --- Judicial Chat ---
 
-@router.post("/judicial/chat_session", response_model=schemas.ChatResponse)
-async def judicial_chat_session_endpoint(request: schemas.ChatRequest, user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
-    if not user:
-         raise HTTPException(status_code=401, detail="Not authenticated")
-    
+def _start_judicial_turn(request: schemas.ChatRequest, user: models.User, db: Session):
+    """Finds or creates the consultation, adds the user's message and returns (session, history) as above."""
     session = None
     if request.session_id:
         session = db.query(models.JudicialChatSession).filter(models.JudicialChatSession.id == request.session_id, models.JudicialChatSession.user_id == user.id).first()
@@ -116,21 +118,21 @@ async def judicial_chat_session_endpoint(request: schemas.ChatRequest, user: mod
         session.title = request.message[:30] + "..." if len(request.message) > 30 else request.message
         db.add(session)
 
-    previous_messages = db.query(models.JudicialMessage).filter(
-        models.JudicialMessage.session_id == session.id
-    ).order_by(models.JudicialMessage.timestamp.desc()).limit(11).all()
-    previous_messages.reverse()
+    history_context = conversation_memory.recent_history(db, models.JudicialMessage, session, exclude_id=user_msg.id)
+    return session, history_context
+
+@router.post("/judicial/chat_session", response_model=schemas.ChatResponse)
+async def judicial_chat_session_endpoint(request: schemas.ChatRequest, user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
+    if not user:
+         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    history_context = []
-    for msg in previous_messages:
-        if msg.id != user_msg.id:
-             history_context.append({"role": msg.role, "content": msg.content})
+    session, history_context = _start_judicial_turn(request, user, db)
 
     # Commit the session and user message before calling the (potentially slow) AI
     db.commit()
 
     try:
-        response_text = query_judicial_rag(request.message, history=history_context, language=user.preferred_language, user=user, db=db, focused_case_id=request.case_id)
+        response_text = await llm_executor.run_blocking(query_judicial_rag, request.message, history=history_context, language=user.preferred_language, user=user, db=db, focused_case_id=request.case_id, summary=session.summary)
     except Exception as e:
         logger.error(f"Judicial RAG error: {e}", exc_info=True)
         response_text = "I'm sorry, there was an internal error processing your request. Please try again."
@@ -140,6 +142,7 @@ async def judicial_chat_session_endpoint(request: schemas.ChatRequest, user: mod
     
     session.updated_at = datetime.utcnow()
     db.commit()
+    conversation_memory.summarize_in_background(models.JudicialChatSession, models.JudicialMessage, session.id)
     return schemas.ChatResponse(response=response_text, session_id=session.id)
 
 @router.delete("/judicial/chat_session/{session_id}")
@@ -159,3 +162,122 @@ async def delete_judicial_chat_session(session_id: int, user: models.User = Depe
     db.delete(session)
     db.commit()
     return {"response": "Session deleted successfully"}
+
+# --- Streaming (server-sent events) ---
+# Each stream emits "delta" events with markdown as it is generated and a final "done"
+# event carrying the complete response (and session_id) that the client should keep.
+
+def _stream_answer(prepared, task, generation_config, render_json=False, session_id=None, persist=None):
+    async def events():
+        final_text = None
+        shown = ""
+        try:
+            if prepared.answer is not None:
+                final_text = prepared.answer
+            else:
+                renderer = JsonBulletStream() if render_json else None
+                try:
+                    chunks = rag_engine.stream_text(task, prepared.prompt, generation_config)
+                    async for raw in llm_executor.iterate_blocking(chunks):
+                        delta = renderer.feed(raw) if renderer else raw
+                        if delta:
+                            shown += delta
+                            yield sse_event({"delta": delta}, event="delta")
+                    if renderer:
+                        # The batch renderer is authoritative for what gets stored and cached
+                        final_text = rag_engine.render_json_answer(renderer.raw)
+                        prepared.remember(final_text)
+                    else:
+                        final_text = shown
+                except model_router.AllModelsUnavailable as e:
+                    logger.warning(f"{task} stream: {e}")
+                    final_text = rag_engine.CHAT_UNAVAILABLE if task == "chat" else rag_engine.JUDICIAL_UNAVAILABLE
+                except Exception as e:
+                    logger.error(f"{task} stream error: {e}", exc_info=True)
+                    final_text = shown or "I'm sorry, there was an internal error processing your request. Please try again."
+            yield sse_event({"response": final_text, "session_id": session_id}, event="done")
+        finally:
+            # Runs on completion and on client disconnect (then with what was generated so far)
+            text = final_text if final_text is not None else shown
+            if persist and text:
+                # Off the event loop; shielded so a disconnect cancelling the stream cannot drop the write
+                await asyncio.shield(run_in_threadpool(persist, text))
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _persist_reply(message_model, session_model, session_id):
+    """Stores the AI reply in a fresh DB session: the request's session is closed once streaming starts."""
+    def persist(text):
+        db = database.SessionLocal()
+        try:
+            db.add(message_model(session_id=session_id, role="ai", content=text))
+            session = db.query(session_model).filter(session_model.id == session_id).first()
+            if session:
+                session.updated_at = datetime.utcnow()
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to store streamed reply: {e}", exc_info=True)
+            return
+        finally:
+            db.close()
+        conversation_memory.summarize_in_background(session_model, message_model, session_id)
+    return persist
+
+@router.post("/chat_session/stream")
+async def chat_session_stream_endpoint(request: schemas.ChatRequest, user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
+    if not user:
+         raise HTTPException(status_code=401, detail="Not authenticated")
+
+    session, history_context = _start_chat_turn(request, user, db)
+    db.commit()
+    session_id = session.id
+
+    try:
+        prepared = await llm_executor.run_blocking(rag_engine.prepare_rag, request.message, history=history_context, language=user.preferred_language, summary=session.summary)
+    except Exception as e:
+        logger.error(f"RAG error: {e}", exc_info=True)
+        prepared = rag_engine.PreparedAnswer(answer="I'm sorry, there was an internal error processing your request. Please try again.")
+
+    return _stream_answer(prepared, "chat", rag_engine.CHAT_GENERATION_CONFIG, render_json=True, session_id=session_id,
+                          persist=_persist_reply(models.Message, models.ChatSession, session_id))
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: schemas.ChatRequest, chat_count: Optional[str] = Cookie(None)):
+    current_count = 0
+    if chat_count:
+        try:
+            current_count = int(chat_count)
+        except Exception:
+            current_count = 0
+
+    if current_count >= 5:
+        prepared = rag_engine.PreparedAnswer(answer="You have reached the free limit of 5 messages. Please [Login](/login) or [Register](/register) to continue.")
+        return _stream_answer(prepared, "chat", rag_engine.CHAT_GENERATION_CONFIG)
+
+    try:
+        prepared = await llm_executor.run_blocking(rag_engine.prepare_rag, request.message, language="en")
+    except Exception as e:
+        logger.error(f"Guest chat RAG error: {e}", exc_info=True)
+        prepared = rag_engine.PreparedAnswer(answer="I'm sorry, there was an error processing your request. Please try again.")
+
+    response = _stream_answer(prepared, "chat", rag_engine.CHAT_GENERATION_CONFIG, render_json=True)
+    response.set_cookie(key="chat_count", value=str(current_count + 1), max_age=86400, samesite="lax")
+    return response
+
+@router.post("/judicial/chat_session/stream")
+async def judicial_chat_session_stream_endpoint(request: schemas.ChatRequest, user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
+    if not user:
+         raise HTTPException(status_code=401, detail="Not authenticated")
+
+    session, history_context = _start_judicial_turn(request, user, db)
+    db.commit()
+    session_id = session.id
+
+    try:
+        prepared = await llm_executor.run_blocking(rag_engine.prepare_judicial_rag, request.message, history=history_context, language=user.preferred_language, user=user, db=db, focused_case_id=request.case_id, summary=session.summary)
+    except Exception as e:
+        logger.error(f"Judicial RAG error: {e}", exc_info=True)
+        prepared = rag_engine.PreparedAnswer(answer="I'm sorry, there was an internal error processing your request. Please try again.")
+
+    return _stream_answer(prepared, "judicial", rag_engine.JUDICIAL_GENERATION_CONFIG, session_id=session_id,
+                          persist=_persist_reply(models.JudicialMessage, models.JudicialChatSession, session_id))
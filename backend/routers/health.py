@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from .. import warmup
+
+router = APIRouter(tags=["Health"])
+
+@router.get("/healthz")
+async def liveness():
+    """The process is up and serving requests (it may still be warming up)."""
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readiness():
+    """200 once the start-up warm-up has finished, 503 with its progress until then."""
+    status = warmup.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming_up", **status})
+    return {"status": "ready", **status}
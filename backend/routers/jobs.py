@@ -0,0 +1,93 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from .. import models, database, auth, jobs
+from ..streaming import sse_event
+from .tools import DraftRequest, DOCUMENT_TYPES
+
+router = APIRouter(tags=["Jobs"])
+
+POLL_INTERVAL = 1.0  # Seconds between job status reads while streaming events
+
+
+def _accepted(job):
+    return {"job_id": job.id, "status": job.status}
+
+@router.post("/jobs/simplify_doc", status_code=202)
+async def submit_simplify_doc(file: UploadFile = File(...), user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if file.content_type not in DOCUMENT_TYPES:
+        raise HTTPException(status_code=400, detail="Only JPG, PNG, and PDF files are supported.")
+
+    content = await file.read()
+    job = jobs.submit(db, user.id, "simplify_doc", {"mime_type": file.content_type, "language": user.preferred_language}, content)
+    return _accepted(job)
+
+@router.post("/jobs/generate-draft", status_code=202)
+async def submit_generate_draft(request: DraftRequest, user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    job = jobs.submit(db, user.id, "generate_draft", {"case_type": request.case_type, "details": request.details, "language": request.language})
+    return _accepted(job)
+
+@router.post("/jobs/transcribe", status_code=202)
+async def submit_transcribe(file: UploadFile = File(...), user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    file_bytes = await file.read()
+    job = jobs.submit(db, user.id, "transcribe", {"mime_type": file.content_type or "audio/webm"}, file_bytes)
+    return _accepted(job)
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str, user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
+    """Status, latest progress and (once done) the result of a job."""
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    job = jobs.get(db, job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return jobs.to_dict(job)
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request, user: models.User = Depends(auth.get_current_user_from_cookie)):
+    """
+    Server-sent events for a job: "progress" whenever its status or progress changes,
+    then one "done" or "failed" event carrying the final state.
+    """
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    user_id = user.id
+
+    def read():
+        db = database.SessionLocal()
+        try:
+            job = jobs.get(db, job_id, user_id)
+            return jobs.to_dict(job) if job else None
+        finally:
+            db.close()
+
+    # Reads run on the thread pool: a blocking query per poll per client would stall the event loop
+    if await run_in_threadpool(read) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last = None
+        while not await request.is_disconnected():
+            state = await run_in_threadpool(read)
+            if state is None:
+                yield sse_event({"detail": "Job not found"}, event="failed")
+                return
+            if state["status"] in jobs.FINISHED:
+                yield sse_event(state, event=state["status"])
+                return
+            if (state["status"], state["progress"]) != last:
+                last = (state["status"], state["progress"])
+                yield sse_event(state, event="progress")
+            await asyncio.sleep(POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -2,8 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import List
-from datetime import datetime
-from .. import schemas, models, database, auth, judicial_engine
+from .. import schemas, models, database, auth, judicial_engine, case_context, case_loaders
 
 router = APIRouter(prefix="/cases", tags=["Judicial"])
 
@@ -34,7 +33,7 @@ async def create_case(case: schemas.CaseCreate, user: models.User = Depends(auth
 async def get_my_cases(user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    return db.query(models.Case).filter(models.Case.user_id == user.id).order_by(models.Case.updated_at.desc()).all()
+    return case_loaders.list_cases(db, user.id)
 
 @router.delete("/{case_id}")
 async def delete_case(case_id: int, user: models.User = Depends(auth.get_current_user_from_cookie), db: Session = Depends(database.get_db)):
@@ -47,6 +46,7 @@ async def delete_case(case_id: int, user: models.User = Depends(auth.get_current
         
     db.delete(case)
     db.commit()
+    case_context.case_cache.invalidate(case_id)
     return {"message": "Case deleted successfully"}
 
 # --- CNR Registration ---
@@ -69,7 +69,7 @@ async def update_cnr(case_id: int, cnr_data: schemas.CNRUpdate, user: models.Use
         raise HTTPException(status_code=409, detail="This CNR number is already registered to another case.")
     
     case.cnr_number = cnr_data.cnr_number
-    case.updated_at = datetime.utcnow()
+    case_context.touch(case)
     
     # Auto-advance from Pre-Filing → Filing when CNR is registered
     if case.current_stage == "Pre-Filing":
@@ -108,9 +108,10 @@ async def add_case_event(case_id: int, event: schemas.CaseEventCreate, user: mod
     
     if next_stage and event.auto_advance:
         case.current_stage = next_stage
-        case.updated_at = datetime.utcnow()
-        db.add(case)
-        
+    # Every change to a case bumps updated_at, the version of its cached chat context
+    case_context.touch(case)
+    db.add(case)
+
     db.commit()
     db.refresh(new_event)
     return new_event
@@ -145,7 +146,7 @@ async def save_case_document(case_id: int, doc: schemas.CaseDocumentCreate, user
     evidence_idx = stage_order.index("Evidence Submission")
     if current_idx < evidence_idx:
         case.current_stage = models.CaseStage.EVIDENCE_SUBMISSION.value
-        case.updated_at = datetime.utcnow()
+    case_context.touch(case)
 
     db.commit()
     db.refresh(new_doc)
@@ -169,6 +170,7 @@ async def delete_case_document(case_id: int, doc_id: int, user: models.User = De
         raise HTTPException(status_code=404, detail="Case not found")
     
     db.delete(doc)
+    case_context.touch(case)
     db.commit()
     return {"message": "Document deleted"}
 
@@ -203,7 +205,7 @@ async def add_hearing(case_id: int, hearing: schemas.HearingCreate, user: models
     hearing_idx = stage_order.index("Hearing")
     if current_idx < hearing_idx:
         case.current_stage = models.CaseStage.HEARING.value
-    case.updated_at = datetime.utcnow()  # Fix #15: always update timestamp
+    case_context.touch(case)  # Fix #15: always update timestamp
 
     db.commit()
     db.refresh(new_hearing)
@@ -223,6 +225,7 @@ async def delete_hearing(case_id: int, hearing_id: int, user: models.User = Depe
         raise HTTPException(status_code=404, detail="Hearing not found")
     
     db.delete(hearing)
+    case_context.touch(case)
     db.commit()
     return {"message": "Hearing deleted"}
 
@@ -258,7 +261,7 @@ async def record_judgment(case_id: int, judgment: schemas.JudgmentCreate, user:
     # Auto-advance: Judgment → Closed
     case.current_stage = models.CaseStage.CLOSED.value
     case.status = models.CaseStatus.CLOSED.value
-    case.updated_at = datetime.utcnow()
+    case_context.touch(case)
 
     try:
         db.commit()
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Request, Depends, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from .. import schemas, models, database, auth, forms_data, judicial_engine
+from .. import schemas, models, database, auth, forms_data, judicial_engine, case_loaders
 
 router = APIRouter(tags=["Pages"])
 templates = Jinja2Templates(directory="templates")
@@ -103,7 +103,7 @@ async def judicial_guidance_page(request: Request, session_id: int = None, user:
         messages = db.query(models.JudicialMessage).filter(models.JudicialMessage.session_id == current_session.id).order_by(models.JudicialMessage.timestamp.asc()).all()
     
     # Fetch user's cases for the case selector
-    user_cases = db.query(models.Case).filter(models.Case.user_id == user.id).order_by(models.Case.updated_at.desc()).all()
+    user_cases = db.query(models.Case).options(*case_loaders.CASE_SELECTOR).filter(models.Case.user_id == user.id).order_by(models.Case.updated_at.desc()).all()
         
     return templates.TemplateResponse("judicial_guidance.html", {
         "request": request, 
@@ -119,7 +119,7 @@ async def get_case_details_page(request: Request, case_id: int, user: models.Use
     if not user:
         return RedirectResponse(url="/login")
     
-    case = db.query(models.Case).filter(models.Case.id == case_id, models.Case.user_id == user.id).first()
+    case = case_loaders.case_detail(db, case_id, user.id)
     if not case:
         return templates.TemplateResponse("error_page.html", {
             "request": request,
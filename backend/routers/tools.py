@@ -2,12 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from .. import schemas, models, database, auth
-from .. import doc_processor, form_builder
+from .. import doc_processor, form_builder, llm_executor
 from ..rag_engine import transcribe_audio
 
 router = APIRouter(tags=["Tools"])
 
 
+DOCUMENT_TYPES = ["image/jpeg", "image/png", "application/pdf"]
+
+
 class DraftRequest(BaseModel):
     case_type: str
     details: str
@@ -31,11 +34,11 @@ async def simplify_document_endpoint(file: UploadFile = File(...), user: models.
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    if file.content_type not in ["image/jpeg", "image/png", "application/pdf"]:
+    if file.content_type not in DOCUMENT_TYPES:
         raise HTTPException(status_code=400, detail="Only JPG, PNG, and PDF files are supported.")
     
     content = await file.read()
-    summary = doc_processor.simplify_document(content, file.content_type, language=user.preferred_language)
+    summary = await llm_executor.run_blocking(doc_processor.simplify_document, content, file.content_type, language=user.preferred_language)
     return {"response": summary}
 
 @router.post("/generate-draft")
@@ -43,7 +46,7 @@ async def generate_legal_draft(request: DraftRequest, user: models.User = Depend
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    draft = form_builder.generate_draft(request.case_type, request.details, request.language)
+    draft = await llm_executor.run_blocking(form_builder.generate_draft, request.case_type, request.details, request.language)
     return {"draft": draft}
 
 @router.post("/transcribe")
@@ -53,7 +56,7 @@ async def transcribe_endpoint(file: UploadFile = File(...), user: models.User =
     
     try:
         file_bytes = await file.read()
-        transcript = transcribe_audio(file_bytes, mime_type=file.content_type or "audio/webm")
+        transcript = await llm_executor.run_blocking(transcribe_audio, file_bytes, mime_type=file.content_type or "audio/webm")
         
         if "Error" in transcript:
             raise HTTPException(status_code=500, detail=transcript)
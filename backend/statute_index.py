@@ -0,0 +1,196 @@
+import os
+import re
+import json
+import gzip
+import tempfile
+import threading
+from .lexical_index import parse_references, act_code, CONSTITUTION
+
+# A provision heading is its number followed by a full stop ("303.", "21A."). It is not always at
+# a line start: the Constitution extracts as one run-on line per page ("...THE UNION AND ITS
+# TERRITORY1. Name and territory...", "3[2A.[Sikkim..."), so only digits, brackets and
+# commas are ruled out in front of it.
+HEADING = re.compile(r"(?<![\d(,/])(\d{1,3})([A-Z]{0,2})\.\s*(?=[A-Z(—\-\[])")
+# "CHAPTER XVII", "CHAPTERV", "PART IIICITIZENSHIP" (run-on); the gazette's "PART II—SECTION 1" masthead is not a division
+DIVISION = re.compile(r"(?<!\[)\b(CHAPTER|PART)\s*([IVX]+)(?![IVXa-z])(?!\s*[—-]\s*S(?:EC|ec))")
+MAX_GAP = 3  # Repealed/omitted provisions leave small holes in the numbering
+INDEX_RUN_AVG_CHARS = 200  # A run of numbered entries this short on average is a table of contents
+DEFAULT_ACT_ORDER = ["BNS", "BNSS", "BSA"]  # Where a bare "Section N" is looked up first
+
+
+def _heading_of(text):
+    """Marginal heading if the act prints one ("Protection of life.—No person..."), else the opening words."""
+    match = re.match(r"\s*(.{3,150}?)\s*(?:\.\s*[—–-]{1,2}|[—–]{1,2})", text)
+    if match:
+        return match.group(1).strip()
+    opening = " ".join(text.split()[:12])
+    return opening + ("…" if len(text.split()) > 12 else "")
+
+
+def _sort_key(number):
+    digits = re.match(r"\d+", number).group(0)
+    return int(digits), number[len(digits):]
+
+
+class StatuteParser:
+    """
+    Turns a stream of (page_number, text) into numbered provisions.
+
+    Headings are accepted only when they continue the numbering (next number, a small
+    gap, or a lettered insertion like 21A after 21), which filters out stray "3." in
+    running text and numbered footnotes. The numbering restarts at "1." only after a
+    run of contents-style one-liners, so the table of contents is parsed first and then
+    superseded: for every number the longest text wins.
+    """
+
+    def __init__(self):
+        self.provisions = {}  # number -> {"chapter", "page", "text"}
+        self._current = None
+        self._last = None
+        self._division = None
+        self._run_count = 0
+        self._run_chars = 0
+
+    def _accepts(self, number, suffix):
+        if self._last is None:
+            return number == 1 and not suffix
+        if number == 1 and not suffix:
+            return self._run_chars < INDEX_RUN_AVG_CHARS * self._run_count
+        last_number, last_suffix = self._last
+        if suffix:
+            return number == last_number and suffix > last_suffix or number == last_number + 1
+        return last_number < number <= last_number + MAX_GAP
+
+    def _close(self):
+        if self._current is None:
+            return
+        number, record = self._current
+        record["text"] = " ".join(record["text"].split())
+        self._run_count += 1
+        self._run_chars += len(record["text"])
+        existing = self.provisions.get(number)
+        if existing is None or len(record["text"]) > len(existing["text"]):
+            self.provisions[number] = record
+        self._current = None
+
+    def feed(self, page_number, text):
+        position = 0
+        for match in HEADING.finditer(text):
+            number, suffix = int(match.group(1)), match.group(2)
+            if not self._accepts(number, suffix):
+                continue
+            self._append(text[position:match.start()])
+            self._close()
+            if number == 1 and not suffix:
+                self._run_count = self._run_chars = 0
+            self._last = (number, suffix)
+            self._current = (f"{number}{suffix}", {"chapter": self._division, "page": page_number, "text": ""})
+            position = match.end()
+        self._append(text[position:])
+
+    def _append(self, text):
+        for match in DIVISION.finditer(text):
+            self._division = f"{match.group(1).title()} {match.group(2)}"
+        if self._current is not None:
+            self._current[1]["text"] += text + "\n"
+
+    def observe(self, pages):
+        """Pass-through generator: parses pages while handing them on to the chunker."""
+        for page_number, text in pages:
+            self.feed(page_number, text)
+            yield page_number, text
+
+    def finish(self):
+        self._close()
+        return {
+            number: [record["chapter"], _heading_of(record["text"]), record["page"], record["text"]]
+            for number, record in sorted(self.provisions.items(), key=lambda item: _sort_key(item[0]))
+        }
+
+
+class StatuteIndex:
+    """
+    Section/article index for BNS, BNSS, BSA and the Constitution with O(1) lookup by
+    (act, number). Stored on disk as gzip JSON: {act: {number: [chapter, heading, page, text]}}.
+    """
+
+    def __init__(self, acts=None):
+        self.acts = acts or {}
+
+    def set_act(self, act, provisions):
+        self.acts[act] = provisions
+
+    def remove_act(self, act):
+        self.acts.pop(act, None)
+
+    def lookup(self, act, number):
+        row = self.acts.get(act, {}).get(str(number).upper())
+        if row is None:
+            return None
+        chapter, heading, page, text = row
+        return {"act": act, "number": str(number).upper(), "chapter": chapter, "heading": heading, "page": page, "text": text}
+
+    def resolve(self, refs):
+        """Provisions for parsed (act, number) references; a bare section number tries BNS, BNSS, then BSA."""
+        provisions = []
+        for act, number in refs:
+            for candidate in ([act] if act else DEFAULT_ACT_ORDER):
+                provision = self.lookup(candidate, number)
+                if provision:
+                    provisions.append(provision)
+                    break
+        return provisions
+
+    def cited_provisions(self, query_text):
+        return self.resolve(parse_references(query_text))
+
+    def save(self, path):
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".statutes-", suffix=".json.gz")
+        os.close(fd)
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(self.acts, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+
+def citation(provision):
+    """Human-readable label, e.g. 'BNS Section 303 — Theft (Chapter XVII)'."""
+    if provision["act"] == CONSTITUTION:
+        label = f"Constitution of India Article {provision['number']}"
+    else:
+        label = f"{provision['act']} Section {provision['number']}"
+    label += f" — {provision['heading']}"
+    if provision.get("chapter"):
+        label += f" ({provision['chapter']})"
+    return label
+
+
+_loaded = {"index": None, "mtime": None}
+_load_lock = threading.Lock()
+
+
+def get_index(path):
+    """The persisted statute index, reloaded after a re-ingest. None if it was never built."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _loaded["mtime"] != mtime:
+        with _load_lock:
+            if _loaded["mtime"] != mtime:
+                _loaded["index"] = StatuteIndex.load(path)
+                _loaded["mtime"] = mtime
+    return _loaded["index"]
@@ -0,0 +1,143 @@
+import json
+
+ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def sse_event(data, event=None):
+    """One server-sent event carrying a JSON payload."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class JsonBulletStream:
+    """
+    Incremental version of rag_engine.render_json_answer for streamed generations.
+
+    query_rag asks the model for [{"title": ..., "content": ...}, ...]. `feed` takes raw
+    text deltas as they arrive and returns the markdown that can already be shown: a
+    bullet opens as soon as an item's title is complete, and content is passed through
+    character by character (JSON escapes decoded, surrounding whitespace trimmed like
+    the batch renderer does). Output that does not start with JSON, after an optional
+    ``` fence, is passed through unchanged.
+    """
+
+    def __init__(self):
+        self.raw = ""
+        self.mode = None  # None until decided, then "json" or "text"
+        self._pending = ""  # Leading text held back until the mode is known
+        self._in_string = False
+        self._escape = None  # None, "" after a backslash, or the hex digits of a \u escape
+        self._string = []  # Decoded characters of the current string
+        self._string_role = None  # "key", "title", "content" or None (a string we do not render)
+        self._stack = []  # Open containers, "{" or "["
+        self._awaiting_key = False  # The innermost object expects a key next
+        self._item = None  # {"key": last key, "open": bullet started} for the innermost object
+        self._items = []
+        self._space = ""  # Whitespace held back inside content, emitted only if more text follows
+        self._content_started = False
+
+    def feed(self, delta):
+        self.raw += delta
+        if self.mode is None:
+            self._pending += delta
+            stripped = self._pending.lstrip()
+            if stripped.startswith("`"):
+                newline = stripped.find("\n")
+                if newline == -1:
+                    return ""
+                stripped = stripped[newline + 1:].lstrip()
+            if not stripped:
+                return ""
+            self.mode = "json" if stripped[0] in "[{" else "text"
+            delta, self._pending = (self._pending if self.mode == "text" else stripped), ""
+        if self.mode == "text":
+            return delta
+        return "".join(self._consume(ch) for ch in delta)
+
+    def _consume(self, ch):
+        if self._in_string:
+            return self._string_char(ch)
+        if ch == '"':
+            self._in_string = True
+            self._string = []
+            self._string_role = self._role()
+            self._content_started = False
+            self._space = ""
+            if self._string_role == "content" and not self._item["open"]:
+                self._item["open"] = True
+                return "\n* "
+            return ""
+        if ch == "{":
+            self._stack.append("{")
+            self._awaiting_key = True
+            self._items.append(self._item)
+            self._item = {"key": None, "open": False}
+        elif ch == "[":
+            self._stack.append("[")
+        elif ch in "}]" and self._stack:
+            self._stack.pop()
+            self._awaiting_key = False
+            if ch == "}":
+                item, self._item = self._item, self._items.pop()
+                if item and item["open"]:
+                    return "\n"
+        elif ch == ":":
+            self._awaiting_key = False
+        elif ch == "," and self._stack and self._stack[-1] == "{":
+            self._awaiting_key = True
+        return ""
+
+    def _role(self):
+        if not self._stack or self._stack[-1] != "{":
+            return None
+        if self._awaiting_key:
+            return "key"
+        if self._item["key"] in ("title", "content"):
+            return self._item["key"]
+        return None
+
+    def _string_char(self, ch):
+        if self._escape is not None:
+            if self._escape == "" and ch != "u":
+                self._escape = None
+                return self._emit(ESCAPES.get(ch, ch))
+            self._escape += ch
+            if len(self._escape) < 5:
+                return ""
+            code, self._escape = self._escape[1:], None
+            try:
+                return self._emit(chr(int(code, 16)))
+            except ValueError:
+                return ""
+        if ch == "\\":
+            self._escape = ""
+            return ""
+        if ch == '"':
+            return self._end_string()
+        return self._emit(ch)
+
+    def _emit(self, ch):
+        if self._string_role != "content":
+            self._string.append(ch)
+            return ""
+        if ch.isspace():
+            if self._content_started:
+                self._space += ch
+            return ""
+        self._content_started = True
+        out, self._space = self._space + ch, ""
+        return out
+
+    def _end_string(self):
+        self._in_string = False
+        text = "".join(self._string)
+        role, self._string_role = self._string_role, None
+        if role == "key":
+            self._item["key"] = text
+            return ""
+        if role == "title" and not self._item["open"]:
+            title = text.strip()
+            if title and title.lower() != "none":
+                self._item["open"] = True
+                return f"\n* **{title}**: "
+        return ""
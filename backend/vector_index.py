@@ -0,0 +1,269 @@
+import os
+import json
+import glob
+import gzip
+import uuid
+import tempfile
+import threading
+import numpy as np
+
+# A read-only vector index for a corpus of a few thousand chunks, as an alternative to
+# querying Chroma. Embeddings are stored L2-normalised as a float16 matrix in a raw file
+# that is memory-mapped, so opening it costs nothing and every uvicorn worker shares the
+# same page-cache pages; ids, documents and metadata live in a gzipped JSON sidecar.
+#
+#   <path>.<gen>.f16      count x dim float16, row-major, rows normalised
+#   <path>.meta.json.gz   {"version", "vectors", "dim", "count", "ids", "documents", "metadatas"}
+#
+# Each build writes its matrix under a new generation id and then swaps in the sidecar,
+# which names that file in "vectors", so a reader always pairs a sidecar with its own
+# matrix. The previous generation is kept for readers that opened the old sidecar.
+#
+# The index answers the subset of Chroma's collection API that retrieval uses (query,
+# get, count), so it can stand in for the collection.
+
+
+def _write_atomic(path, write):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".vectors-")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _normalized(vectors):
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def _matches(meta, where):
+    """Chroma `where` semantics for the operators retrieval uses: equality, $eq, $in, $and, $or."""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(meta, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(meta, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            for op, value in condition.items():
+                if op == "$eq" and meta.get(key) != value:
+                    return False
+                if op == "$ne" and meta.get(key) == value:
+                    return False
+                if op == "$in" and meta.get(key) not in value:
+                    return False
+                if op == "$nin" and meta.get(key) in value:
+                    return False
+                if op not in ("$eq", "$ne", "$in", "$nin"):
+                    raise ValueError(f"Unsupported where operator {op!r}")
+        elif meta.get(key) != condition:
+            return False
+    return True
+
+
+class MmapVectorIndex:
+    VERSION = 2
+    BLOCK_ROWS = 2048  # Rows converted to float32 at a time while scoring (stays in cache)
+
+    def __init__(self, path, vectors, ids, documents, metadatas):
+        self.path = path
+        self.vectors = vectors  # np.memmap (count x dim, float16)
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.name = os.path.basename(path)
+        self._id_index = {doc_id: idx for idx, doc_id in enumerate(ids)}
+        self._masks = {}  # where clause (as JSON) -> boolean row mask
+        self._mask_lock = threading.Lock()
+
+    # --- Building ---
+
+    @classmethod
+    def build(cls, path, ids, documents, metadatas, embeddings):
+        """
+        Writes the matrix under a new generation, then the sidecar naming it (whose
+        replacement signals readers to reload), then deletes older generations.
+        """
+        matrix = _normalized(embeddings).astype(np.float16) if len(ids) else np.zeros((0, 0), np.float16)
+        if matrix.shape[0] != len(ids):
+            raise ValueError(f"{len(ids)} ids but {matrix.shape[0]} embeddings")
+
+        def write_vectors(tmp_path):
+            matrix.tofile(tmp_path)
+
+        def write_meta(tmp_path):
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump({
+                    "version": cls.VERSION, "vectors": vectors_name, "dim": int(matrix.shape[1]) if matrix.size else 0, "count": len(ids),
+                    "ids": list(ids), "documents": list(documents), "metadatas": list(metadatas),
+                }, f)
+
+        previous = cls._vectors_path(path)
+        vectors_name = f"{os.path.basename(path)}.{uuid.uuid4().hex}.f16"
+        current = os.path.join(os.path.dirname(path), vectors_name)
+        _write_atomic(current, write_vectors)
+        _write_atomic(path + ".meta.json.gz", write_meta)
+        for stale in glob.glob(glob.escape(path) + ".*.f16") + [path + ".f16"]:
+            if stale not in (current, previous) and os.path.exists(stale):
+                os.remove(stale)
+
+    @staticmethod
+    def _vectors_path(path, meta=None):
+        """The matrix file a sidecar names (version 1 sidecars had no generations), or None."""
+        if meta is None:
+            try:
+                with gzip.open(path + ".meta.json.gz", "rt", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return None
+        if "vectors" not in meta:
+            return path + ".f16"
+        return os.path.join(os.path.dirname(path), meta["vectors"])
+
+    @classmethod
+    def build_from_collection(cls, collection, path, page_size=1000):
+        """Snapshot of every chunk in a Chroma collection, embeddings included."""
+        ids, documents, metadatas, vectors = [], [], [], []
+        offset = 0
+        while True:
+            page = collection.get(include=["documents", "metadatas", "embeddings"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            documents.extend(page["documents"])
+            metadatas.extend(page["metadatas"])
+            vectors.extend(page["embeddings"])
+            offset += len(page["ids"])
+        cls.build(path, ids, documents, metadatas, vectors)
+        return len(ids)
+
+    @classmethod
+    def load(cls, path, attempts=3):
+        for attempt in range(attempts):
+            with gzip.open(path + ".meta.json.gz", "rt", encoding="utf-8") as f:
+                meta = json.load(f)
+            try:
+                return cls._open(path, meta)
+            except FileNotFoundError:
+                # Two rebuilds since the sidecar was read deleted its matrix: read the new one
+                if attempt == attempts - 1:
+                    raise
+
+    @classmethod
+    def _open(cls, path, meta):
+        if meta.get("version") not in (1, cls.VERSION):
+            raise ValueError(f"Unsupported vector index version {meta.get('version')} at {path}")
+        count, dim = meta["count"], meta["dim"]
+        vectors_path = cls._vectors_path(path, meta)
+        if count and os.path.getsize(vectors_path) != count * dim * 2:
+            raise ValueError(f"Vector file {vectors_path} does not match its sidecar ({count} x {dim})")
+        if count:
+            vectors = np.memmap(vectors_path, dtype=np.float16, mode="r", shape=(count, dim))
+        else:
+            vectors = np.zeros((0, dim), dtype=np.float16)
+        return cls(path, vectors, meta["ids"], meta["documents"], meta["metadatas"])
+
+    # --- Chroma-compatible reads ---
+
+    def count(self):
+        return len(self.ids)
+
+    def _mask(self, where):
+        if not where:
+            return None
+        key = json.dumps(where, sort_keys=True)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.fromiter((_matches(meta, where) for meta in self.metadatas), dtype=bool, count=len(self.metadatas))
+            with self._mask_lock:
+                self._masks[key] = mask
+        return mask
+
+    def similarities(self, query_embeddings):
+        """Cosine similarity of every row to each query: (count x queries) float32."""
+        queries = _normalized(query_embeddings).T
+        scores = np.empty((len(self.ids), queries.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.ids), self.BLOCK_ROWS):
+            block = self.vectors[start:start + self.BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ queries
+        return scores
+
+    def query(self, query_embeddings, n_results=10, where=None, include=("documents", "metadatas", "distances")):
+        """Top `n_results` rows per query by cosine similarity; distances are 1 - similarity."""
+        results = {"ids": [], "documents": [], "metadatas": [], "embeddings": [], "distances": []}
+        if not len(self.ids) or not len(query_embeddings):
+            for _ in query_embeddings:
+                for key in results:
+                    results[key].append([])
+            return self._select(results, include)
+        scores = self.similarities(query_embeddings)
+        mask = self._mask(where)
+        if mask is not None:
+            scores[~mask] = -np.inf
+        available = int(mask.sum()) if mask is not None else len(self.ids)
+        k = min(n_results, available)
+        for column in scores.T:
+            if k == 0:
+                top = np.array([], dtype=int)
+            else:
+                top = np.argpartition(-column, k - 1)[:k] if k < len(column) else np.arange(len(column))
+                top = top[np.argsort(-column[top], kind="stable")]
+            results["ids"].append([self.ids[i] for i in top])
+            results["documents"].append([self.documents[i] for i in top])
+            results["metadatas"].append([self.metadatas[i] for i in top])
+            results["embeddings"].append(self.vectors[top].astype(np.float32))
+            results["distances"].append([float(1.0 - column[i]) for i in top])
+        return self._select(results, include)
+
+    def get(self, ids=None, where=None, limit=None, offset=0, include=("documents", "metadatas")):
+        if ids is not None:
+            rows = [self._id_index[doc_id] for doc_id in ids if doc_id in self._id_index]
+        else:
+            rows = range(len(self.ids))
+        mask = self._mask(where)
+        if mask is not None:
+            rows = [row for row in rows if mask[row]]
+        rows = list(rows)[offset:offset + limit if limit is not None else None]
+        results = {
+            "ids": [self.ids[i] for i in rows],
+            "documents": [self.documents[i] for i in rows],
+            "metadatas": [self.metadatas[i] for i in rows],
+            "embeddings": self.vectors[rows].astype(np.float32) if rows else np.zeros((0, self.vectors.shape[1]), np.float32),
+        }
+        return {key: value for key, value in results.items() if key == "ids" or key in include}
+
+    @staticmethod
+    def _select(results, include):
+        return {key: value for key, value in results.items() if key == "ids" or key in include}
+
+
+_loaded = {"index": None, "version": None}
+_load_lock = threading.Lock()
+
+
+def get_index(path):
+    """
+    Returns the index at `path`, reloading it when a re-ingest has rewritten it.
+    Returns None when it has not been built yet.
+    """
+    try:
+        stat = os.stat(path + ".meta.json.gz")
+    except OSError:
+        return None
+    version = (stat.st_ino, stat.st_mtime_ns)  # A rebuild replaces the sidecar with a new file
+    if _loaded["version"] != version:
+        with _load_lock:
+            if _loaded["version"] != version:
+                _loaded["index"] = MmapVectorIndex.load(path)
+                _loaded["version"] = version
+    return _loaded["index"]
@@ -0,0 +1,107 @@
+import time
+import logging
+import threading
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Start-up warm-up. Importing the app creates nothing heavy (see resources); the lifespan
+# in main.py runs `run()` in a background thread so the worker answers liveness probes
+# at once, and /readyz reports ready only after every step below has run. A failed step
+# is recorded and logged but does not block readiness: the resource is retried lazily
+# on first use, as it would be without a warm-up.
+
+_lock = threading.Lock()
+_state = {
+    "ready": False,
+    "started_at": None,
+    "finished_at": None,
+    "steps": {},  # step name -> {"seconds": float, "error": str (if it failed)}
+}
+
+
+def _gemini():
+    from . import resources
+    resources.genai()
+
+
+def _vector_store():
+    from . import rag_engine
+    store = rag_engine.search_collection()
+    if hasattr(store, "similarities") and store.count():
+        # Touch every page of the memory-mapped matrix so the first query does not fault them in
+        store.similarities([[1.0] * store.vectors.shape[1]])
+    else:
+        store.count()
+
+
+def _lexical_index():
+    from . import retrieval
+    retrieval.get_lexical_index()
+
+
+def _statute_index():
+    from . import retrieval
+    retrieval.get_statute_index()
+
+
+def _embedding_cache():
+    from . import rag_engine
+    rag_engine.embedding_cache.disk
+
+
+def _document_cache():
+    from . import doc_processor
+    doc_processor.document_cache.disk
+
+
+def _embedding_provider():
+    from . import embeddings
+    provider = embeddings.get_provider()
+    if settings.EMBEDDING_PROVIDER == "local":
+        provider.embed_query("warm-up")  # In-process model: no network call
+
+
+STEPS = [
+    ("gemini", _gemini),
+    ("vector_store", _vector_store),
+    ("lexical_index", _lexical_index),
+    ("statute_index", _statute_index),
+    ("embedding_cache", _embedding_cache),
+    ("document_cache", _document_cache),
+    ("embedding_provider", _embedding_provider),
+]
+
+
+def run():
+    """Creates the heavy resources in turn, recording each step's time or error."""
+    with _lock:
+        _state["started_at"] = time.time()
+    started = time.perf_counter()
+    for name, step in STEPS:
+        step_started = time.perf_counter()
+        entry = {}
+        try:
+            step()
+        except Exception as e:
+            entry["error"] = str(e)
+            logger.error(f"Warm-up step {name} failed: {e}", exc_info=True)
+        entry["seconds"] = round(time.perf_counter() - step_started, 3)
+        with _lock:
+            _state["steps"][name] = entry
+    with _lock:
+        _state["finished_at"] = time.time()
+        _state["ready"] = True
+    logger.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+
+def start():
+    """Runs the warm-up on a daemon thread and returns immediately."""
+    thread = threading.Thread(target=run, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def status():
+    with _lock:
+        return {**_state, "steps": dict(_state["steps"])}
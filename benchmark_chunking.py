@@ -0,0 +1,102 @@
+import os
+import math
+import sys
+import time
+import argparse
+from backend.config import settings
+from backend.chunking import CharChunker, TokenChunker
+from backend.pdf_extract import iter_pdf_pages
+from backend.prompt_budget import estimate_tokens
+
+# Compares chunking strategies over the files in data/: chunk count, chunk size
+# distribution (estimated tokens) and time to chunk, optionally with the time to embed
+# the chunks with the in-process hashing embedding model.
+#
+#   python benchmark_chunking.py                     # all files in data/
+#   python benchmark_chunking.py data/BNS_2023.pdf --embed
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(p / 100.0 * len(ordered)) - 1))]
+
+
+def load_pages(path):
+    if path.lower().endswith(".pdf"):
+        return list(iter_pdf_pages(path, max_workers=settings.PDF_EXTRACT_WORKERS))
+    with open(path, "r", encoding="utf-8") as f:
+        return [(1, f.read())]
+
+
+def run(chunker, pages_by_file, embed=False):
+    started = time.perf_counter()
+    texts = []
+    for pages in pages_by_file.values():
+        # Same filter as ingest.embed_and_store: tiny chunks are never stored
+        texts.extend(text.strip() for _, text, _ in chunker.chunks(pages) if len(text.strip()) >= 50)
+    chunk_time = time.perf_counter() - started
+
+    embed_time = None
+    if embed:
+        from backend.embeddings import HashingEmbeddingProvider
+        provider = HashingEmbeddingProvider(dim=settings.LOCAL_EMBEDDING_DIM)
+        started = time.perf_counter()
+        for start in range(0, len(texts), settings.EMBED_BATCH_SIZE):
+            provider.embed_documents(texts[start:start + settings.EMBED_BATCH_SIZE])
+        embed_time = time.perf_counter() - started
+
+    sizes = [estimate_tokens(text) for text in texts]
+    return {
+        "chunks": len(texts),
+        "tokens": sum(sizes),
+        "min": min(sizes) if sizes else 0,
+        "p50": percentile(sizes, 50) if sizes else 0,
+        "p95": percentile(sizes, 95) if sizes else 0,
+        "max": max(sizes) if sizes else 0,
+        "mean": sum(sizes) / len(sizes) if sizes else 0,
+        "chunk_s": chunk_time,
+        "embed_s": embed_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunking strategies")
+    parser.add_argument("files", nargs="*", help="PDF/TXT files (default: everything in data/)")
+    parser.add_argument("--embed", action="store_true", help="Also time embedding the chunks with the local hashing model")
+    args = parser.parse_args()
+
+    files = args.files or [
+        os.path.join(settings.DATA_DIR, f) for f in sorted(os.listdir(settings.DATA_DIR))
+        if f.lower().endswith((".pdf", ".txt"))
+    ]
+    if not files:
+        print("No PDF or TXT files to benchmark.")
+        sys.exit(1)
+
+    print(f"Extracting {len(files)} file(s)...")
+    started = time.perf_counter()
+    pages_by_file = {path: load_pages(path) for path in files}
+    print(f"Extracted {sum(len(p) for p in pages_by_file.values())} pages in {time.perf_counter() - started:.1f}s\n")
+
+    strategies = [
+        CharChunker(max_chars=settings.CHUNK_MAX_CHARS),
+        TokenChunker(settings.CHUNK_MAX_TOKENS, settings.CHUNK_MIN_TOKENS, settings.CHUNK_OVERLAP_TOKENS),
+        TokenChunker(settings.CHUNK_MAX_TOKENS, settings.CHUNK_MIN_TOKENS, 0),
+    ]
+    header = f"{'strategy':<22}{'chunks':>8}{'tokens':>10}{'min':>6}{'p50':>6}{'p95':>6}{'max':>6}{'mean':>8}{'chunk s':>9}"
+    if args.embed:
+        header += f"{'embed s':>9}"
+    print(header)
+    for chunker in strategies:
+        result = run(chunker, pages_by_file, embed=args.embed)
+        line = (
+            f"{chunker.signature:<22}{result['chunks']:>8}{result['tokens']:>10}{result['min']:>6}{result['p50']:>6}"
+            f"{result['p95']:>6}{result['max']:>6}{result['mean']:>8.1f}{result['chunk_s']:>9.2f}"
+        )
+        if args.embed:
+            line += f"{result['embed_s']:>9.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from backend import models, database, auth
 
 def create_admin_user():
+    database.init_db()
     db = database.SessionLocal()
     
     email = "admin@nyaya.com"
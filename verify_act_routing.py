@@ -0,0 +1,42 @@
+import sys
+from backend.act_router import ActRouter
+
+# Checks act routing decisions: queries that name an act or cite a section are narrowed
+# to it, clearly topical queries to their act, and everything else (including words that
+# merely start like a keyword) searches every act. Pure keyword logic, no index needed.
+
+CASES = [
+    # Regressions: prefix matches used to route these to a single wrong act
+    ("What is the first thing I should do?", None),
+    ("My firm was cheated", None),
+    ("The warranty on my phone expired", None),
+    ("Can I get a written agreement from my landlord?", None),
+    # One weak topical hit is not enough to filter
+    ("Can the police arrest me?", None),
+    ("Is murder punishable with death?", ["BNS"]),
+    # Explicit names and citations
+    ("What does BNSS say about this?", ["BNSS"]),
+    ("Explain Article 21", ["CONSTITUTION"]),
+    ("Is this under BNS 303 or the evidence act?", ["BNS", "BSA"]),
+    ("How do I file an FIR and get bail after arrest?", ["BNSS"]),
+    ("Is a confession to police admissible as evidence?", ["BSA"]),
+    ("Hello", None),
+]
+
+
+def main():
+    router = ActRouter()
+    failures = 0
+    for query, expected in CASES:
+        acts = router.route(query)
+        ok = acts == expected
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {query!r} -> {acts} (expected {expected})")
+    if failures:
+        print(f"❌ {failures} routing case(s) failed")
+        sys.exit(1)
+    print("✅ Act routing verification passed!")
+
+
+if __name__ == "__main__":
+    main()
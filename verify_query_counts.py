@@ -0,0 +1,85 @@
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from backend import models, schemas, case_loaders
+from backend.case_context import CaseContextCache
+
+# Checks that the case read paths cost the same number of SQL queries however many
+# cases a user has (no N+1). Runs against a throwaway in-memory SQLite database.
+
+engine = create_engine("sqlite://")
+models.Base.metadata.create_all(bind=engine)
+Session = sessionmaker(bind=engine)
+
+statements = []
+event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+
+def seed(db, n_cases):
+    user = models.User(email=f"user{n_cases}@example.com", hashed_password="x", full_name="Test")
+    db.add(user)
+    db.flush()
+    for i in range(n_cases):
+        case = models.Case(
+            user_id=user.id, title=f"Case {i}", description="Property dispute", case_type="Civil",
+            plaintiff_name="Asha", defendant_name="Bimal", cnr_number=f"TEST{n_cases:04d}{i:08d}",
+            updated_at=datetime.utcnow() + timedelta(seconds=i),
+        )
+        db.add(case)
+        db.flush()
+        db.add(models.Hearing(case_id=case.id, date=datetime(2024, 1, 1), observation="Adjourned"))
+        db.add(models.CaseDocument(case_id=case.id, title="Agreement", doc_type="Contract", content="...", party="Plaintiff"))
+        db.add(models.CaseEvent(case_id=case.id, title="Filed", date=datetime(2024, 1, 1)))
+        db.add(models.Judgment(case_id=case.id, date=datetime(2024, 6, 1), verdict="Decreed"))
+    db.commit()
+    return user.id
+
+
+def count(fn):
+    statements.clear()
+    fn()
+    return len(statements)
+
+
+def measure(n_cases):
+    db = Session()
+    user_id = seed(db, n_cases)
+    case_id = db.query(models.Case.id).filter(models.Case.user_id == user_id).first()[0]
+    cache = CaseContextCache()
+    results = {}
+
+    db.expire_all()
+    results["judicial chat context (cold)"] = count(lambda: cache.load(db, user_id))
+    db.expire_all()
+    results["judicial chat context (warm)"] = count(lambda: cache.load(db, user_id))
+
+    db.expire_all()
+    results["GET /cases"] = count(lambda: [
+        schemas.CaseResponse.model_validate(case) for case in case_loaders.list_cases(db, user_id)
+    ])
+
+    def detail():
+        case = case_loaders.case_detail(db, case_id, user_id)
+        return len(case.hearings), len(case.documents), case.judgment
+    db.expire_all()
+    results["GET /cases/{case_id}"] = count(detail)
+
+    db.close()
+    return results
+
+
+print("🔍 Verifying query counts for case read paths...")
+
+small, large = measure(1), measure(25)
+ok = True
+for path in small:
+    if small[path] == large[path]:
+        print(f"✅ {path}: {small[path]} queries for 1 case and for 25 cases")
+    else:
+        print(f"❌ {path}: {small[path]} queries for 1 case but {large[path]} for 25 cases")
+        ok = False
+
+if not ok:
+    sys.exit(1)
+print("✅ Query Count Verification Passed!")